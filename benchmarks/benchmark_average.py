@@ -1,6 +1,19 @@
+# Reads "go test -bench" output from stdin and prints averaged results, ranked by speed.
+# Throughput is reported in MB/s (for benchmarks calling b.SetBytes) and records/s.
+#   --save FILE     saves the results as a baseline
+#   --compare FILE  compares the results to a saved baseline and flags statistically significant regressions,
+#                   exits with status 1 if there are any
+import argparse
+import json
+import math
 import sys
 
-labels = set()
+parser = argparse.ArgumentParser(description='Averages results of go test -bench.')
+parser.add_argument('--save', metavar='FILE', help='save results to a JSON baseline file')
+parser.add_argument('--compare', metavar='FILE', help='compare results to a JSON baseline file')
+parser.add_argument('--alpha', type=float, default=0.05, help='significance level of the comparison')
+parser.add_argument('--threshold', type=float, default=0.02, help='ignore relative changes smaller than this')
+args = parser.parse_args()
 
 
 def Number(s: str, suffix: str = '') -> int | float:
@@ -11,10 +24,10 @@ def Number(s: str, suffix: str = '') -> int | float:
     return int(s)
 
 
-records = {}
+records = {}  # Benchmark name -> list of runs, every run is a dictionary of metrics (including N)
 
 
-def add_record(index, *values: int):
+def add_record(index, values: dict[str, int | float]):
     if index in records:
         records[index].append(values)
     else:
@@ -24,17 +37,76 @@ def add_record(index, *values: int):
 for line in sys.stdin:
     if line.startswith('Benchmark'):
         line = [s.strip() for s in line.split('\t')]
-        assert len(line) == 5
-        assert line[0].startswith('Benchmark')
-        add_record(line[0], Number(line[1]), Number(line[2], ' ns/op'), Number(line[3], ' B/op'),
-                   Number(line[4], ' allocs/op'))
+        assert len(line) >= 3
+        # Every column after the number of iterations is a metric like "543 ns/op", "12.3 MB/s" or "0 allocs/op"
+        values = {'N': Number(line[1])}
+        for column in line[2:]:
+            value, unit = column.split(' ', 1)
+            values[unit] = Number(value)
+        add_record(line[0], values)
 
-N = {k: sum(t[0] for t in v) for k, v in records.items()}
-summary = {k: list(sum(t[i] * t[0] for t in v) / N[k] for i in range(1, len(v[0]))) for k, v in records.items()}
-index = sorted(summary.keys(), key=lambda k: summary[k][0])
-summary[index[0]].append('')
-for k in index[1:]:
-    summary[k].append(f'({summary[k][0]/summary[index[0]][0]:.1f}x slower)')
+if not records:
+    sys.exit('no benchmark results in input')
+
+N = {k: sum(t['N'] for t in v) for k, v in records.items()}
+# Averages of metrics weighted by number of iterations
+summary = {k: {unit: sum(t[unit] * t['N'] for t in v) / N[k] for unit in v[0] if unit != 'N'} for k, v in records.items()}
+index = sorted(summary.keys(), key=lambda k: summary[k]['ns/op'])
+fastest = summary[index[0]]['ns/op']
+
+
+# Mann-Whitney U test (as used by benchstat), returns the two-sided p-value using the normal approximation with tie correction
+def mann_whitney(x: list[float], y: list[float]) -> float:
+    n1, n2 = len(x), len(y)
+    values = sorted([(v, 0) for v in x] + [(v, 1) for v in y])
+    rank_sum = 0.
+    tie_correction = 0.
+    i = 0
+    while i < len(values):
+        j = i
+        while j < len(values) and values[j][0] == values[i][0]:
+            j += 1
+        rank = (i + j + 1) / 2  # Average rank of tied values
+        rank_sum += rank * sum(1 for t in values[i:j] if t[1] == 0)
+        tie_correction += (j - i) ** 3 - (j - i)
+        i = j
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * (n + 1 - tie_correction / (n * (n - 1)))
+    if variance <= 0:
+        return 1.
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return math.erfc(max(z, 0) / math.sqrt(2))
+
+
+baseline = {}
+if args.compare:
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+regressions = []
+rows = []
+for k in index:
+    s = summary[k]
+    row = [k, N[k], f'{s["ns/op"]:.0f} ns/op', f'({s["ns/op"] / fastest:.1f}x slower)' if s['ns/op'] > fastest else '',
+           f'{s["MB/s"]:.1f} MB/s' if 'MB/s' in s else '', f'{1e9 / s["ns/op"]:.0f} records/s',
+           f'{s.get("B/op", 0):.0f} B/op', f'{s.get("allocs/op", 0):.0f} allocs/op']
+    if args.compare:
+        comparison = ''
+        if k in baseline:
+            old = [run['ns/op'] for run in baseline[k]]
+            new = [run['ns/op'] for run in records[k]]
+            change = (sum(new) / len(new)) / (sum(old) / len(old)) - 1
+            p = mann_whitney(old, new)
+            comparison = f'{change:+.1%} (p={p:.3f})'
+            if p < args.alpha and abs(change) >= args.threshold:
+                comparison += ' REGRESSION' if change > 0 else ' improvement'
+                if change > 0:
+                    regressions.append(k)
+            else:
+                comparison += ' ~'
+        row.append(comparison)
+    rows.append(row)
 
 
 def print_table(rows: list, just: list[int]):
@@ -54,6 +126,12 @@ def print_table(rows: list, just: list[int]):
         print()
 
 
-print_table([
-    [k, N[k], f'{summary[k][0]:.0f} ns/op', summary[k][3], f'{summary[k][1]:.0f} B/op', f'{summary[k][2]:.0f} allocs/op'] for k in index
-], [4, 0, -4, -1, -4, -4])
+print_table(rows, [4, 0, -4, -1, -4, -4, -4, -4] + ([-4] if args.compare else []))
+
+if args.save:
+    with open(args.save, 'w') as f:
+        json.dump(records, f, indent=1)
+
+if regressions:
+    print(f'{len(regressions)} statistically significant regression(s): {", ".join(regressions)}', file=sys.stderr)
+    sys.exit(1)
@@ -30,8 +30,20 @@ func loadFile(filename string) ([]byte, []int) {
 	return buf, newLines
 }
 
+// setBytes reports the average size of the first b.N lines, so that throughput is reported in MB/s
+func setBytes(b *testing.B, newLines []int) {
+	n := b.N
+	if n >= len(newLines) {
+		n = len(newLines) - 1
+	}
+	if n > 0 {
+		b.SetBytes(int64(newLines[n]-newLines[0]) / int64(n))
+	}
+}
+
 func benchmarkGopyjson(b *testing.B, filename string, data gopyjson.Unmarshaler) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var err error
 	var line []byte
 	b.ResetTimer()
@@ -43,8 +55,24 @@ func benchmarkGopyjson(b *testing.B, filename string, data gopyjson.Unmarshaler)
 	}
 }
 
+// benchmarkGopyjsonIndexed indexes the first b.N lines at once, then parses them one by one using the index
+func benchmarkGopyjsonIndexed(b *testing.B, filename string) {
+	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
+	var data gopyjson.FtxOrderbookSafe
+	var index gopyjson.Index
+	b.ResetTimer()
+	index.Build(buf[:newLines[b.N]])
+	for i := 1; i <= b.N; i++ {
+		if err := data.UnmarshalIndexed(&index); err != nil {
+			panic(err)
+		}
+	}
+}
+
 func benchmarkJsonIter(b *testing.B, filename string, data interface{}) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var err error
 	var line []byte
 	j := jsoniter.ConfigCompatibleWithStandardLibrary
@@ -59,6 +87,7 @@ func benchmarkJsonIter(b *testing.B, filename string, data interface{}) {
 
 func benchmarkEncodingJson(b *testing.B, filename string, data interface{}) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var err error
 	var line []byte
 	b.ResetTimer()
@@ -163,6 +192,7 @@ func simdjsonGetLevels(i *simdjson.Iter, dst *simdjson.Element, levels *[][2]flo
 
 func benchmarkSimdjsonBinanceAggTrades(b *testing.B, filename string) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var (
 		err  error
 		line []byte
@@ -191,6 +221,7 @@ func benchmarkSimdjsonBinanceAggTrades(b *testing.B, filename string) {
 
 func benchmarkSimdjsonFTXOrderbook(b *testing.B, filename string) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var (
 		err  error
 		line []byte
@@ -225,6 +256,7 @@ func benchmarkSimdjsonFTXOrderbook(b *testing.B, filename string) {
 
 func benchmarkFFjson(b *testing.B, filename string, data interface{}) {
 	buf, newLines := loadFile(filename)
+	setBytes(b, newLines)
 	var err error
 	var line []byte
 	b.ResetTimer()
@@ -255,6 +287,9 @@ func Benchmark1EncodingJson(b *testing.B) { benchmarkEncodingJson(b, file1, &typ
 func Benchmark2GopyjsonUnsafe(b *testing.B) {
 	benchmarkGopyjson(b, file2, &gopyjson.FtxOrderbookUnsafe{})
 }
+func Benchmark2GopyjsonIndexed(b *testing.B) {
+	benchmarkGopyjsonIndexed(b, file2)
+}
 func Benchmark2GopyjsonSafe(b *testing.B) { benchmarkGopyjson(b, file2, &gopyjson.FtxOrderbookSafe{}) }
 func Benchmark2Simdjson(b *testing.B)     { benchmarkSimdjsonFTXOrderbook(b, file2) }
 func Benchmark2Jsoniter(b *testing.B)     { benchmarkJsonIter(b, file2, &types.FtxOrderbook{}) }
@@ -0,0 +1,50 @@
+# Generates the gopyjson package used by the benchmarks.
+# Run from any directory: python benchmarks/generate.py
+# Generated parsers are tested by gopyjson/regression_test.go: cd benchmarks && go test ./gopyjson
+
+import os
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+os.chdir(root)  # Package copies go/common.go relative to the working directory
+
+from gopyjson import *
+
+with Package('benchmarks'):
+    for suffix, string in [('Safe', String), ('Unsafe', UnsafeString)]:
+        Struct({
+            'A': Int64() // 'a',
+            'p': string(),
+            'q': string(),
+            'f': Int64(),
+            'l': Int64(),
+            'T': Int64(),
+            'm': Bool(),
+            'M': Bool(),
+        }, 'BinanceAggTrade' + suffix).generate()
+    for suffix, string in [('Safe', String), ('Unsafe', UnsafeString)]:
+        levels = Slice(Array(2, Float64()))
+        orderbook = Struct({
+            'Channel': string() // 'channel',
+            'Market': string() // 'market',
+            'Type': string() // 'type',
+            'Data': Struct({
+                'Time': Float64() // 'time',
+                'Checksum': Int64() // 'checksum',
+                'Bids': levels // 'bids',
+                'Asks': levels // 'asks',
+                'Action': string() // 'action',
+            }) // 'data'
+        }, 'FtxOrderbook' + suffix)
+        orderbook.generate()
+        orderbook.generate_indexed()
+        if not orderbook.references_input():  # Unsafe strings reference the input, which a Decoder reuses
+            orderbook.generate_resumable()
+    # Used only by regression tests
+    Slice(Slice(Int64()), typename='Int64Matrix').generate()
+    Slice(Struct({'A': Int64() // 'a', 'S': String() // 's'}, 'Item'), typename='Items').generate()
+    bounded = Struct({'B': BoundedSlice(2, Int64(), overflow='flag') // 'b'}, 'BoundedInts')
+    bounded.generate()
+    bounded.generate(validate_only=True)
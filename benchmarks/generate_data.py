@@ -0,0 +1,99 @@
+# Generates deterministic synthetic datasets used by the benchmarks:
+# - data/1.ndjson contains objects shaped like Binance aggTrades
+# - data/2.ndjson contains objects shaped like FTX orderbook updates
+# The same arguments always generate the same files, so results can be compared across machines.
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+
+class Generator:
+    # Arguments
+    # seed: seed of the random number generator
+    # shuffle_rate: probability that keys of an object are shuffled instead of being in the usual order
+    # escape_rate: probability that a character of a string value is written as an escape sequence \uXXXX
+    # unknown_keys: number of unknown keys added to every object, parsers have to skip them
+    def __init__(self, seed: int, shuffle_rate: float, escape_rate: float, unknown_keys: int):
+        self.random = random.Random(seed)
+        self.shuffle_rate = shuffle_rate
+        self.escape_rate = escape_rate
+        self.unknown_keys = unknown_keys
+
+    # Encodes a string value, escaping some characters
+    def string(self, s: str) -> str:
+        return '"' + ''.join(f'\\u{ord(c):04x}' if self.random.random() < self.escape_rate else c for c in s) + '"'
+
+    # Generates a random value of an unknown key
+    def unknown_value(self) -> str:
+        kind = self.random.randrange(4)
+        if kind == 0:
+            return str(self.random.randrange(10 ** 9))
+        if kind == 1:
+            return self.string(''.join(self.random.choices('abcdefghijklmnopqrstuvwxyz', k=self.random.randrange(1, 20))))
+        if kind == 2:
+            return '[' + ','.join(f'{self.random.uniform(0, 1000):.4f}' for _ in range(self.random.randrange(5))) + ']'
+        return '{"id":' + str(self.random.randrange(1000)) + ',"flag":' + self.random.choice(['true', 'false']) + '}'
+
+    # Encodes an object given as a list of (key, encoded value), possibly shuffling keys and adding unknown keys
+    def object(self, items: list[tuple[str, str]]) -> str:
+        items = items + [(f'x{i}', self.unknown_value()) for i in range(self.unknown_keys)]
+        if self.random.random() < self.shuffle_rate:
+            self.random.shuffle(items)
+        return '{' + ','.join(f'"{k}":{v}' for k, v in items) + '}'
+
+    def binance_agg_trade(self, i: int) -> str:
+        trade_id = 1047037960 + i
+        first = 1207691977 + 2 * i
+        return self.object([
+            ('a', str(trade_id)),
+            ('p', self.string(f'{self.random.uniform(30000, 60000):.8f}')),
+            ('q', self.string(f'{self.random.expovariate(100):.8f}')),
+            ('f', str(first)),
+            ('l', str(first + self.random.randrange(3))),
+            ('T', str(1640995200000 + 37 * i)),
+            ('m', self.random.choice(['true', 'false'])),
+            ('M', 'true'),
+        ])
+
+    def ftx_orderbook(self, i: int) -> str:
+        def levels() -> str:
+            return json.dumps([[round(self.random.uniform(41000, 42000), 1), round(self.random.expovariate(0.5), 4)]
+                               for _ in range(self.random.randrange(1, 30))], separators=(',', ':'))
+
+        return self.object([
+            ('channel', self.string('orderbook')),
+            ('market', self.string('BTC-PERP')),
+            ('type', self.string('update')),
+            ('data', self.object([
+                ('time', f'{1644151209.618892 + 0.01 * i:.6f}'),
+                ('checksum', str(self.random.randrange(2 ** 32))),
+                ('bids', levels()),
+                ('asks', levels()),
+                ('action', self.string('update')),
+            ])),
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates synthetic datasets for benchmarks.')
+    parser.add_argument('--records', type=int, default=100000, help='number of objects in every file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shuffle-rate', type=float, default=0., help='probability that keys of an object are shuffled')
+    parser.add_argument('--escape-rate', type=float, default=0., help='probability that a string character is escaped')
+    parser.add_argument('--unknown-keys', type=int, default=0, help='number of unknown keys in every object')
+    parser.add_argument('--output', default='data', help='output directory')
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.mkdir(exist_ok=True)
+    for filename, method in [('1.ndjson', Generator.binance_agg_trade), ('2.ndjson', Generator.ftx_orderbook)]:
+        generator = Generator(args.seed, args.shuffle_rate, args.escape_rate, args.unknown_keys)
+        with open(output.joinpath(filename), 'w') as f:
+            for i in range(args.records):
+                f.write(method(generator, i) + '\n')
+
+
+if __name__ == '__main__':
+    main()
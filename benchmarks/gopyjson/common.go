@@ -8,11 +8,18 @@ package gopyjson
 
 import (
 	"bytes"
+	"compress/gzip"
+	"encoding/binary"
 	"encoding/json"
 	"errors"
 	_ "fmt"
+	"io"
 	"math"
+	"math/bits"
+	"runtime"
 	"runtime/debug"
+	"strconv"
+	"sync"
 	"unsafe"
 )
 
@@ -43,6 +50,8 @@ const (
 	errIntTooSmall    = "integer too small"
 	errUintTooBig     = "unsigned integer too big"
 	errUTF8           = "invalid UTF-8 string"
+	errEofArray       = "unexpected end of array"
+	errArrayTooLong   = "array longer than bounded slice"
 )
 
 // Unmarshaler interface, implementations are generated using this package
@@ -97,11 +106,19 @@ func withStack(err interface{}) string {
 	}
 }
 
+// passthroughError wraps errors that don't come from parsing, e.g. errors returned by callbacks or I/O errors.
+// RecoverLater saves the wrapped error as is, without adding a stacktrace.
+type passthroughError struct {
+	err error
+}
+
 // RecoverLater is used in combination with defer to recover from errors and save them to the err variable.
 func RecoverLater(err *error) {
 	r := recover()
 	if r == nil {
 		*err = nil
+	} else if e, ok := r.(passthroughError); ok {
+		*err = e.err
 	} else {
 		*err = errors.New(withStack(r))
 	}
@@ -132,6 +149,62 @@ func bytesToString(bs []byte) string {
 	return *(*string)(unsafe.Pointer(&bs))
 }
 
+// SWAR (SIMD within a register) functions below process 8 bytes of input at once using 64-bit integer operations.
+// This lets us skip over long strings and skipped values without assembly.
+const (
+	swarOnes = 0x0101010101010101 // Byte 0x01 repeated 8 times
+	swarLow  = 0x7f7f7f7f7f7f7f7f // Byte 0x7f repeated 8 times
+	swarHigh = 0x8080808080808080 // Byte 0x80 repeated 8 times
+)
+
+// swarLoad reads 8 bytes from b starting at position n, so that b[n] is the lowest byte of the result
+func swarLoad(b []byte, n int) uint64 {
+	return binary.LittleEndian.Uint64(b[n : n+8])
+}
+
+// swarEqual returns a mask with the highest bit set in the bytes of x that are equal to c.
+// Due to borrowing, bytes above the lowest matching byte can be marked falsely, so only the lowest set bit is exact.
+// The mask is zero if and only if no byte in x is equal to c.
+func swarEqual(x uint64, c byte) uint64 {
+	x ^= swarOnes * uint64(c)
+	return (x - swarOnes) & ^x & swarHigh
+}
+
+// swarFirst returns the index of the lowest byte marked in a nonzero mask returned by swarEqual
+func swarFirst(mask uint64) int {
+	return bits.TrailingZeros64(mask) >> 3
+}
+
+// swarStructural returns a mask that is zero only if x doesn't contain any of the characters {}[]," (and two more).
+// Setting the 0x20 bit maps '[' to '{' and ']' to '}', so 4 comparisons are enough.
+// As a side effect, it also maps control characters '\x02' to '"' and '\x0c' to ',', so those are marked too,
+// which is fine for skipping. The marked bytes are 0x02, 0x0c, 0x22, 0x2c, 0x5b, 0x5d, 0x7b and 0x7d.
+func swarStructural(x uint64) uint64 {
+	x |= swarOnes * 0x20
+	return swarEqual(x, '{') | swarEqual(x, '}') | swarEqual(x, ',') | swarEqual(x, '"')
+}
+
+// swarBytes returns a mask with the highest bit set in exactly the bytes of x that are equal to c.
+// Unlike swarEqual, there are no false positives, at the cost of two more operations.
+func swarBytes(x uint64, c byte) uint64 {
+	x ^= swarOnes * uint64(c)
+	return ^((x&swarLow + swarLow) | x) & swarHigh
+}
+
+// swarSpace returns a mask with the highest bit set in exactly the bytes of x that are whitespace (see isSpace)
+func swarSpace(x uint64) uint64 {
+	// Bytes from '\t' to '\r' are found by two additions that carry into the highest bit of a byte for bytes
+	// at least '\t' and at least '\r'+1, bytes with the highest bit already set are excluded
+	low := x & swarLow
+	between := (low + swarOnes*(0x80-'\t')) &^ (low + swarOnes*(0x80-'\r'-1)) &^ x
+	return between&swarHigh | swarBytes(x, ' ')
+}
+
+// swarMoveMask packs the highest bits of the bytes of a mask into the lowest 8 bits, the highest bit of byte i into bit i
+func swarMoveMask(mask uint64) uint64 {
+	return (mask & swarHigh) * 0x02040810204081 >> 56
+}
+
 // trimLeftSpace skips over any whitespace characters in b and updates N
 func trimLeftSpace(b *[]byte, N *int) {
 	for ; *N < len(*b); *N++ {
@@ -187,21 +260,32 @@ func pTrimStringBytes(b *[]byte, N *int) (result []byte) {
 		panic(ParseError{*b, *N, errExpectedString})
 	}
 	*N++
-	for start := *N; *N < len(*b); *N++ {
-		if (*b)[*N] == '"' {
-			// Check if there is an even number of backslashes preceding this quote
-			firstBackslash := *N - 1
-			for (*b)[firstBackslash] == '\\' {
-				firstBackslash--
-			}
-			if (*N-firstBackslash)%2 != 0 {
-				result = (*b)[start:*N]
-				*N++
-				return
+	for start := *N; ; *N++ {
+		// Look for the next quote 8 bytes at a time, then finish byte by byte
+		for *N+8 <= len(*b) {
+			if mask := swarEqual(swarLoad(*b, *N), '"'); mask != 0 {
+				*N += swarFirst(mask)
+				break
 			}
+			*N += 8
+		}
+		for *N < len(*b) && (*b)[*N] != '"' {
+			*N++
+		}
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofCloseQuote})
+		}
+		// Check if there is an even number of backslashes preceding this quote
+		firstBackslash := *N - 1
+		for (*b)[firstBackslash] == '\\' {
+			firstBackslash--
+		}
+		if (*N-firstBackslash)%2 != 0 {
+			result = (*b)[start:*N]
+			*N++
+			return
 		}
 	}
-	panic(ParseError{*b, *N, errEofCloseQuote})
 }
 
 // pTrimKeyColon reads a quote-delimited string, followed by whitespace, followed by a colon, followed by whitespace
@@ -325,7 +409,53 @@ func pTrimBool(b *[]byte, N *int) bool {
 	panic(ParseError{*b, *N, errExpectedBool})
 }
 
-// pTrimValue skips over a JSON value followed by a comma (in b starting at position N)
+// pTrimRaw skips over exactly one JSON value (in b starting at position N) and returns it as is, without copying.
+// Unlike pTrimValue, the value may be followed by anything, including the end of input, and no whitespace is included.
+// JSON is validated using json.Valid
+func pTrimRaw(b *[]byte, N *int) []byte {
+	panicEof(b, N, errEofValue)
+	n := *N
+	switch (*b)[*N] {
+	case '"':
+		pTrimStringBytes(b, N)
+	case '{', '[':
+		// Brackets are only counted here, mismatched brackets are found by json.Valid
+		depth := 0
+		for {
+			// Skip 8 bytes at a time while there are no structural characters
+			for *N+8 <= len(*b) && swarStructural(swarLoad(*b, *N)) == 0 {
+				*N += 8
+			}
+			if *N >= len(*b) {
+				panic(ParseError{*b, *N, errEofValue})
+			}
+			switch (*b)[*N] {
+			case '{', '[':
+				depth++
+			case '}', ']':
+				depth--
+			case '"':
+				pTrimStringBytes(b, N)
+				*N--
+			}
+			*N++
+			if depth == 0 {
+				break
+			}
+		}
+	default:
+		// Numbers, booleans and null end at a delimiter
+		for *N < len(*b) && !isSpace((*b)[*N]) && (*b)[*N] != ',' && (*b)[*N] != '}' && (*b)[*N] != ']' {
+			*N++
+		}
+	}
+	if !json.Valid((*b)[n:*N]) {
+		panic(ParseError{*b, *N, errSyntax})
+	}
+	return (*b)[n:*N]
+}
+
+// pTrimValue skips over a JSON value followed by a comma or a closing brace or bracket (in b starting at position N)
 // JSON is validated using json.Valid
 // To bound memory usage and avoid allocations, JSON tree depth for the value is bounded to maxStackSize
 func pTrimValue(b *[]byte, N *int) {
@@ -335,6 +465,10 @@ func pTrimValue(b *[]byte, N *int) {
 	var stack [maxStackSize]byte
 	n := *N
 	for {
+		// Skip 8 bytes at a time while there are no structural characters
+		for *N+8 <= len(*b) && swarStructural(swarLoad(*b, *N)) == 0 {
+			*N += 8
+		}
 		if *N >= len(*b) {
 			panic(ParseError{*b, *N, errEofValue})
 		}
@@ -355,7 +489,10 @@ func pTrimValue(b *[]byte, N *int) {
 			}
 		case ']':
 			if stackSize == 0 {
-				panic(ParseError{*b, *N, errSyntax})
+				if !json.Valid((*b)[n:*N]) {
+					panic(ParseError{*b, *N, errSyntax})
+				}
+				return
 			} else if stack[stackSize-1] == '[' {
 				stackSize--
 			} else {
@@ -392,3 +529,1075 @@ func pTrimValue(b *[]byte, N *int) {
 // The conversion involves replacing "\\t" by '\t', "\\\\" by '\\' ...
 //go:linkname unquoteBytes encoding/json.unquoteBytes
 func unquoteBytes(s []byte) (t []byte, ok bool)
+
+// validQuoted reports whether unquoteBytes would succeed on a quoted JSON string, without making a copy
+// Control characters are not allowed, escape sequences are only checked when there is a backslash
+func validQuoted(quoted []byte) bool {
+	for _, c := range quoted {
+		if c < ' ' {
+			return false
+		}
+		if c == '\\' {
+			return json.Valid(quoted)
+		}
+	}
+	return true
+}
+
+// Index is a structural index of JSON input, built by a single pass over the input before parsing it,
+// like stage 1 of simdjson. The pass processes blocks of 64 bytes using SWAR and records the positions of
+// structural characters {}[]:, outside strings, of quotes that are not escaped and of the first bytes of
+// other values (numbers and literals). Indexed parsers, generated by Parser.generate_indexed(), use it to
+// jump over whitespace to the next entry and to find the ends of strings and skipped values without scanning them.
+// The index doesn't change results of parsing: parsers scan the input as usual wherever the index doesn't apply,
+// e.g. after a string that malformed input delimits differently than the index, or at a backslash outside strings.
+// A whole NDJSON block can be indexed at once and then parsed value by value.
+type Index struct {
+	data    []byte   // Indexed input
+	entries []uint32 // Positions of indexed bytes in data, with indexOpenQuote set for quotes that start a string
+	cursor  int      // Index of the first entry that is not before the current position, moved by seek
+	n       int      // Position in data where parsing continues
+	start   int      // Position in data of the value being parsed
+}
+
+// indexOpenQuote marks entries that are quotes starting a string, which limits indexed input to 2 GB.
+// Larger input is parsed without using the index.
+const indexOpenQuote = 1 << 31
+
+// indexState is carried from one block of 64 bytes to the next while building an index
+type indexState struct {
+	escaped  uint64 // 1 if the first byte of the block is escaped by a backslash at the end of the previous block
+	inString uint64 // All bits set if the block starts inside a string
+	boundary uint64 // 1 if the last byte of the previous block is whitespace, a structural character or a quote
+}
+
+// Build indexes data, which is then parsed from the beginning by indexed unmarshalers.
+// The index keeps a reference to data, values unmarshaled without copying may reference it as well.
+// Memory used by the previous index is reused.
+func (x *Index) Build(data []byte) {
+	*x = Index{data: data, entries: x.entries[:0]}
+	if len(data) >= indexOpenQuote {
+		return
+	}
+	// The start of input is a boundary, so a value starting at position 0 is indexed
+	state := indexState{boundary: 1}
+	for n := 0; n < len(data); n += 64 {
+		if n+64 <= len(data) {
+			x.indexBlock(data[n:n+64], n, &state)
+			continue
+		}
+		// The last block is padded with whitespace, which is never indexed
+		var block [64]byte
+		for i := copy(block[:], data[n:]); i < len(block); i++ {
+			block[i] = ' '
+		}
+		x.indexBlock(block[:], n, &state)
+	}
+}
+
+// indexBlock appends entries of a block of 64 bytes that starts at position n of the input.
+// Bit i of the masks below corresponds to byte i of the block.
+func (x *Index) indexBlock(block []byte, n int, s *indexState) {
+	var quote, backslash, op, space uint64
+	for i := 0; i < 64; i += 8 {
+		w := swarLoad(block, i)
+		brackets := w | swarOnes*0x20 // Maps '[' to '{' and ']' to '}'
+		quote |= swarMoveMask(swarBytes(w, '"')) << i
+		backslash |= swarMoveMask(swarBytes(w, '\\')) << i
+		op |= swarMoveMask(swarBytes(brackets, '{')|swarBytes(brackets, '}')|swarBytes(w, ',')|swarBytes(w, ':')) << i
+		space |= swarMoveMask(swarSpace(w)) << i
+	}
+
+	// A backslash escapes the next byte unless it is escaped itself. Backslashes are rare, so they are handled one by one.
+	escaped := s.escaped
+	s.escaped = 0
+	for b := backslash &^ escaped; b != 0; b &= b - 1 {
+		i := bits.TrailingZeros64(b)
+		if i == 63 {
+			s.escaped = 1
+			break
+		}
+		escaped |= 2 << i
+		b &^= 2 << i
+	}
+	quote &^= escaped
+
+	// Bytes from a quote that starts a string up to the closing quote are inside the string, which is a prefix XOR of quotes
+	inString := quote
+	inString ^= inString << 1
+	inString ^= inString << 2
+	inString ^= inString << 4
+	inString ^= inString << 8
+	inString ^= inString << 16
+	inString ^= inString << 32
+	inString ^= s.inString
+	s.inString = uint64(int64(inString) >> 63)
+
+	// Other bytes outside strings start a value if they follow whitespace, a structural character or a quote
+	op &^= inString
+	boundary := op | space | quote
+	starts := ^(boundary | inString) & (boundary<<1 | s.boundary)
+	s.boundary = boundary >> 63
+
+	// Backslashes outside strings are invalid JSON, they are indexed so that indexed parsers can fall back to regular ones,
+	// which don't treat them as escapes
+	open := quote & inString
+	for entries := op | quote | starts | backslash&^inString; entries != 0; entries &= entries - 1 {
+		i := bits.TrailingZeros64(entries)
+		x.entries = append(x.entries, uint32(n+i)|uint32(open>>i&1)<<31)
+	}
+}
+
+// position returns the position in the input of entry i
+func (x *Index) position(i int) int {
+	return int(x.entries[i] &^ indexOpenQuote)
+}
+
+// seek moves the cursor to the first entry at or after position n and returns it
+func (x *Index) seek(n int) int {
+	for x.cursor > 0 && x.position(x.cursor-1) >= n {
+		x.cursor--
+	}
+	for x.cursor < len(x.entries) && x.position(x.cursor) < n {
+		x.cursor++
+	}
+	return x.cursor
+}
+
+// outside reports whether bytes right before entry i are outside strings according to the index
+func (x *Index) outside(i int) bool {
+	return i == 0 || x.entries[i-1]&indexOpenQuote == 0
+}
+
+// trimLeftSpace is the same as trimLeftSpace, but jumps over whitespace to the next entry.
+// Outside strings, a byte that follows whitespace is either whitespace or indexed, so only whitespace is skipped.
+func (x *Index) trimLeftSpace(b *[]byte, N *int) {
+	if *N >= len(*b) || !isSpace((*b)[*N]) {
+		return
+	}
+	if i := x.seek(*N); i < len(x.entries) && x.outside(i) {
+		*N = x.position(i)
+		return
+	}
+	trimLeftSpace(b, N)
+}
+
+// pTrimStringBytes is the same as pTrimStringBytes, but finds the closing quote using the index.
+// Quotes that are not escaped are always indexed, so the closing quote is the next indexed quote.
+func (x *Index) pTrimStringBytes(b *[]byte, N *int) []byte {
+	if *N < len(*b) && (*b)[*N] == '"' {
+		if i := x.seek(*N); i < len(x.entries) && x.position(i) == *N {
+			for i++; i < len(x.entries); i++ {
+				if end := x.position(i); (*b)[end] == '"' {
+					result := (*b)[*N+1 : end]
+					*N = end + 1
+					x.cursor = i + 1
+					return result
+				}
+			}
+		}
+	}
+	return pTrimStringBytes(b, N)
+}
+
+// pTrimKeyColon is the same as pTrimKeyColon, but uses the index
+func (x *Index) pTrimKeyColon(b *[]byte, N *int) (s string) {
+	s = bytesToString(x.pTrimStringBytes(b, N))
+	x.trimLeftSpace(b, N)
+	pTrimByte(b, N, ':')
+	x.trimLeftSpace(b, N)
+	return
+}
+
+// pTrimValue is the same as pTrimValue, but finds the end of the value by walking over entries
+func (x *Index) pTrimValue(b *[]byte, N *int) {
+	i := x.seek(*N)
+	if i == len(x.entries) || x.position(i) != *N || !x.outside(i) {
+		pTrimValue(b, N)
+		return
+	}
+	const maxStackSize = 100
+	stackSize := 0
+	var stack [maxStackSize]byte
+	n := *N
+	for ; i < len(x.entries); i++ {
+		*N = x.position(i)
+		switch (*b)[*N] {
+		case ',':
+			if stackSize == 0 {
+				if !json.Valid((*b)[n:*N]) {
+					panic(ParseError{*b, *N, errSyntax})
+				}
+				x.cursor = i
+				return
+			}
+		case '[', '{':
+			if stackSize == maxStackSize {
+				panic(ParseError{*b, *N, errTooDeep})
+			}
+			stack[stackSize] = (*b)[*N]
+			stackSize++
+		case ']', '}':
+			if stackSize == 0 {
+				if !json.Valid((*b)[n:*N]) {
+					panic(ParseError{*b, *N, errSyntax})
+				}
+				x.cursor = i
+				return
+			}
+			// Maps ']' to '[' and '}' to '{'
+			if stack[stackSize-1] != (*b)[*N]-2 {
+				panic(ParseError{*b, *N, errSyntax})
+			}
+			stackSize--
+		case '\\':
+			// Invalid JSON, the regular parser finds where exactly
+			*N = n
+			pTrimValue(b, N)
+			return
+		case '"':
+			// The string ends at the next indexed quote
+			for i++; i < len(x.entries) && (*b)[x.position(i)] != '"'; i++ {
+			}
+			if i == len(x.entries) {
+				*N = len(*b)
+				panic(ParseError{*b, *N, errEofCloseQuote})
+			}
+		}
+	}
+	*N = len(*b)
+	panic(ParseError{*b, *N, errEofValue})
+}
+
+// nextValue skips whitespace before the next value and returns the input and position used by indexed parsers.
+// Returns ok == false if there are no more values.
+func (x *Index) nextValue() (b *[]byte, N *int, ok bool) {
+	x.trimLeftSpace(&x.data, &x.n)
+	x.start = x.n
+	return &x.data, &x.n, x.n < len(x.data)
+}
+
+// skipLineOnError is deferred by indexed unmarshalers. If parsing failed, parsing continues at the line
+// following the start of the malformed value, so that a malformed line of NDJSON doesn't affect the following lines.
+func (x *Index) skipLineOnError(err *error) {
+	if *err == nil {
+		return
+	}
+	if i := bytes.IndexByte(x.data[x.start:], '\n'); i >= 0 {
+		x.n = x.start + i + 1
+	} else {
+		x.n = len(x.data)
+	}
+}
+
+// ErrNeedMore is returned by Decoder.Decode when the buffered input doesn't contain a complete JSON value yet
+var ErrNeedMore = errors.New("need more input")
+
+// scanner finds the end of a single JSON value in input that arrives in chunks.
+// The state is kept between calls to scan, so every byte is scanned only once, no matter how the input is fragmented.
+// The scanner doesn't validate JSON, it only tracks strings and nesting. Validation is left to the parsers.
+type scanner struct {
+	depth    int  // Nesting depth of objects and arrays
+	started  bool // Whether the first non-whitespace byte of the value was seen
+	scalar   bool // Whether the value is a number or a literal (true, false, null)
+	inString bool // Whether we are inside a quote-delimited string
+	escaped  bool // Whether the previous byte inside a string was a backslash
+}
+
+// scan continues scanning b starting at position N.
+// If the end of the value is found, N is updated to point right after the value, and the scanner is reset.
+// Otherwise, N is set to len(b) and more input is needed.
+// Top-level numbers and literals end at the first whitespace or delimiter, so they must be followed by one (e.g. a new line).
+func (s *scanner) scan(b []byte, N *int) (done bool) {
+	for ; *N < len(b); *N++ {
+		// Skip 8 bytes at a time while nothing inside them can change the state
+		if s.inString && !s.escaped {
+			for *N+8 <= len(b) {
+				x := swarLoad(b, *N)
+				if mask := swarEqual(x, '"') | swarEqual(x, '\\'); mask != 0 {
+					*N += swarFirst(mask)
+					break
+				}
+				*N += 8
+			}
+		} else if s.started && !s.inString && !s.scalar {
+			for *N+8 <= len(b) && swarStructural(swarLoad(b, *N)) == 0 {
+				*N += 8
+			}
+		}
+		if *N >= len(b) {
+			break
+		}
+		c := b[*N]
+		if s.inString {
+			if s.escaped {
+				s.escaped = false
+			} else if c == '\\' {
+				s.escaped = true
+			} else if c == '"' {
+				s.inString = false
+				if s.depth == 0 {
+					*N++
+					*s = scanner{}
+					return true
+				}
+			}
+			continue
+		}
+		if !s.started {
+			if isSpace(c) {
+				continue
+			}
+			s.started = true
+			s.scalar = c != '"' && c != '{' && c != '['
+			if s.scalar {
+				// The first byte always belongs to the value, even if it is a delimiter
+				continue
+			}
+		}
+		if s.scalar {
+			if isSpace(c) || c == ',' || c == '}' || c == ']' {
+				*s = scanner{}
+				return true
+			}
+			continue
+		}
+		switch c {
+		case '"':
+			s.inString = true
+		case '{', '[':
+			s.depth++
+		case '}', ']':
+			s.depth--
+			if s.depth <= 0 {
+				*N++
+				*s = scanner{}
+				return true
+			}
+		}
+	}
+	return false
+}
+
+// Decoder unmarshals a stream of JSON values that arrives in arbitrarily fragmented chunks,
+// e.g. websocket continuation frames or partial TCP reads.
+// Values that are completely contained in a chunk are parsed directly from that chunk without copying.
+// A value that spans multiple chunks is copied into an internal buffer, which is reused, and parsed once all of it was fed,
+// unless its type was generated with generate_resumable(). Objects and arrays of such types are parsed as the chunks
+// arrive, only values inside them that span chunks (strings, numbers, and values of types without resumable parsers)
+// are buffered, so the buffer doesn't grow to the size of the whole value. See resume.
+// Numbers and literals at the top level end at a delimiter, so the last one in a stream is unmarshaled only by Flush.
+type Decoder struct {
+	pending []byte // Buffered input, pending[start:] was not parsed yet and starts with an incomplete value
+	start   int    // Number of bytes in pending that were already parsed, they are discarded by the next Decode
+	scanned int    // Number of bytes in pending that were already scanned
+	chunk   []byte // The unparsed part of the last chunk passed to Feed
+	scanner
+
+	// State of resumable parsing, see resume
+	resuming  bool    // Whether a value is being parsed by a resumable parser
+	skipping  bool    // Whether the rest of a malformed value is being skipped
+	frames    []frame // Objects and arrays being parsed by resumable parsers, the outermost first
+	inner     scanner // Finds the end of a value inside a resumable value, see leaf
+	leafValue []byte  // The last value returned by leaf
+	leafN     int     // Position in leafValue where its parser stopped
+	leafChunk int     // Number of bytes at the end of leafValue that come from the current chunk
+}
+
+// Feed passes the next chunk of input to the decoder.
+// The decoder keeps a reference to the chunk, so it must not be modified until Decode returns ErrNeedMore.
+// Values unmarshaled without copying (e.g. using UnsafeString or Raw) may also reference the chunk.
+func (d *Decoder) Feed(chunk []byte) {
+	if len(d.chunk) > 0 && (d.resuming || d.skipping) {
+		// The rest of the previous chunk is parsed first, it is rarely not consumed yet, so both are simply copied
+		d.chunk = append(d.chunk[:len(d.chunk):len(d.chunk)], chunk...)
+		return
+	}
+	if len(d.chunk) > 0 {
+		d.pending = append(d.pending, d.chunk...)
+	}
+	d.chunk = chunk
+}
+
+// Decode unmarshals the next JSON value into v.
+// Returns ErrNeedMore if the input fed so far doesn't contain another complete value, in that case Feed should be called.
+// If v.Unmarshal fails, the malformed value is skipped, so decoding can continue with the next value.
+// A value spanning multiple chunks is parsed from the internal buffer, values unmarshaled from it without copying
+// are valid only until the next call to Decode.
+// After ErrNeedMore, Decode must be called with the same v, which may be already partially filled by a resumable parser.
+func (d *Decoder) Decode(v Unmarshaler) error {
+	if d.skipping {
+		n := 0
+		if !d.scanner.scan(d.chunk, &n) {
+			d.chunk = nil
+			return ErrNeedMore
+		}
+		d.chunk = d.chunk[n:]
+		d.skipping = false
+	}
+	if d.resuming {
+		return d.resume(v.(resumable))
+	}
+	if d.start > 0 {
+		// The previous value may reference the parsed input, so it is discarded only now
+		d.pending = d.pending[:copy(d.pending, d.pending[d.start:])]
+		d.scanned -= d.start
+		d.start = 0
+	}
+	if len(d.pending) > 0 {
+		// Finish scanning the buffered input first
+		if d.scanner.scan(d.pending, &d.scanned) {
+			d.start = d.scanned
+			return v.Unmarshal(d.pending[:d.scanned])
+		}
+		n := 0
+		if d.scanner.scan(d.chunk, &n) {
+			// The value spans the buffered input and the current chunk
+			d.pending = append(d.pending, d.chunk[:n]...)
+			d.chunk = d.chunk[n:]
+			d.scanned = len(d.pending)
+			d.start = len(d.pending)
+			return v.Unmarshal(d.pending)
+		}
+		d.pending = append(d.pending, d.chunk...)
+		d.scanned = len(d.pending)
+		d.chunk = nil
+		return ErrNeedMore
+	}
+	n := 0
+	if d.scanner.scan(d.chunk, &n) {
+		// Fast path, the value is contained in the current chunk
+		value := d.chunk[:n]
+		d.chunk = d.chunk[n:]
+		return v.Unmarshal(value)
+	}
+	if d.scanner.started {
+		if r, ok := v.(resumable); ok && d.scanner.depth > 0 {
+			// An object or array spans chunks, it is parsed as they arrive, starting with this chunk
+			d.scanner = scanner{}
+			d.resuming = true
+			return d.resume(r)
+		}
+		d.pending = append(d.pending[:0], d.chunk...)
+		d.scanned = len(d.pending)
+	}
+	d.chunk = nil
+	return ErrNeedMore
+}
+
+// Flush is used instead of Decode once the whole stream was fed. It also unmarshals a number or literal
+// (true, false, null) at the end of the stream, which Decode can't tell is complete without a delimiter after it.
+// Returns io.EOF if there are no more values, and io.ErrUnexpectedEOF if the stream ends inside a string, object or array.
+func (d *Decoder) Flush(v Unmarshaler) error {
+	if err := d.Decode(v); err != ErrNeedMore {
+		return err
+	}
+	if d.resuming || d.skipping {
+		d.stopResuming()
+		d.skipping = false
+		d.scanner = scanner{}
+		return io.ErrUnexpectedEOF
+	}
+	// All the input left is in the buffer now
+	started, scalar := d.scanner.started, d.scanner.scalar
+	value := d.pending[d.start:]
+	d.scanner = scanner{}
+	d.start = len(d.pending)
+	d.scanned = len(d.pending)
+	if !started {
+		return io.EOF
+	}
+	if !scalar {
+		return io.ErrUnexpectedEOF
+	}
+	return v.Unmarshal(value)
+}
+
+// resumable is implemented by types generated with generate_resumable(), see resume
+type resumable interface {
+	// unmarshalResumable continues parsing the value from the current chunk of d, v is zeroed when parsing starts.
+	// Returns done == true once the whole value was parsed.
+	unmarshalResumable(d *Decoder) (done bool, err error)
+}
+
+// frame is the state of an object or array being parsed by a resumable parser
+type frame struct {
+	state int // One of the frame* constants below
+	field int // Index of the struct field being parsed, starting from 1, or 0 if the value of an unknown key is skipped
+}
+
+// States of a frame
+const (
+	frameStart   = iota // Before the opening brace or bracket
+	frameFirst          // After the opening brace or bracket
+	frameComma          // After a comma
+	frameKey            // Inside a key
+	frameColon          // After a key, before the colon
+	frameValue          // Inside a value
+	frameAfter          // After a value
+	frameSkipped        // After a value that was skipped
+)
+
+// resume parses the current chunk using the resumable parser of v. Every object or array has its own parser,
+// generated function rTrim<n>(d *Decoder, k int, v *type<n>) bool, which keeps its state in frame k and returns
+// false if more input is needed. The parser of the top level value calls the parsers of nested objects and arrays,
+// so parsing is continued by calling it again with the next chunk. Other values are parsed by the regular parsers,
+// see leaf. The scanner finds the end of the value in the meantime, as it does for other values, so the parser doesn't
+// read past it, and the rest of a malformed value is skipped by the scanner.
+func (d *Decoder) resume(v resumable) error {
+	n := 0
+	end := d.scanner.scan(d.chunk, &n)
+	next := d.chunk[n:]
+	d.chunk = d.chunk[:n]
+	done, err := v.unmarshalResumable(d)
+	if !end && !done && err == nil {
+		return ErrNeedMore
+	}
+	d.stopResuming()
+	if end {
+		d.chunk = next
+		if !done && err == nil {
+			err = ParseError{nil, 0, errEof}
+		}
+		return err
+	}
+	// The value was parsed, or is malformed, before its end, the rest is skipped
+	d.skipping = true
+	d.chunk = nil
+	return err
+}
+
+// stopResuming resets the state of resumable parsing
+func (d *Decoder) stopResuming() {
+	d.resuming = false
+	d.frames = d.frames[:0]
+	d.inner = scanner{}
+	d.pending = d.pending[:0]
+}
+
+// enter adds frame k when the resumable parser of an object or array at depth k is called for the first time
+func (d *Decoder) enter(k int) {
+	if k == len(d.frames) {
+		d.frames = append(d.frames, frame{})
+	}
+}
+
+// space skips whitespace in the current chunk, returns false if the chunk ends first
+func (d *Decoder) space() bool {
+	n := 0
+	trimLeftSpace(&d.chunk, &n)
+	d.chunk = d.chunk[n:]
+	return len(d.chunk) > 0
+}
+
+// pConsume skips over byte c, which must be the first byte of the current chunk
+func (d *Decoder) pConsume(c byte) {
+	n := 0
+	pTrimByte(&d.chunk, &n, c)
+	d.chunk = d.chunk[1:]
+}
+
+// key advances the object of frame k to its next key, which is returned once all of it was fed.
+// Returns done == true after the closing brace, and ok == false if more input is needed.
+// Keys are delimited like in the object loop of regular parsers, see Struct.object_loop() in gopyjson.py.
+func (d *Decoder) key(k int) (key []byte, done, ok bool) {
+	s := &d.frames[k]
+	for s.state != frameKey {
+		if !d.space() {
+			return nil, false, false
+		}
+		c := d.chunk[0]
+		switch {
+		case s.state == frameStart:
+			d.pConsume('{')
+			s.state = frameFirst
+		case c == '}' && s.state != frameComma:
+			d.chunk = d.chunk[1:]
+			d.frames = d.frames[:k]
+			return nil, true, true
+		case c == ',' && s.state >= frameAfter:
+			d.chunk = d.chunk[1:]
+			s.state = frameComma
+		case s.state == frameSkipped:
+			// pTrimValue requires a skipped value to be followed by a comma or a closing brace
+			panic(ParseError{d.chunk, 0, errSyntax})
+		default:
+			s.state = frameKey
+		}
+	}
+	b, N, ok := d.leaf()
+	if !ok {
+		return nil, false, false
+	}
+	key = pTrimStringBytes(b, N)
+	d.parsed()
+	s.state = frameColon
+	return key, false, true
+}
+
+// colon skips over the colon after the key of frame k, returns false if more input is needed
+func (d *Decoder) colon(k int) bool {
+	if !d.space() {
+		return false
+	}
+	d.pConsume(':')
+	d.frames[k].state = frameValue
+	return true
+}
+
+// element advances the array of frame k to its next element.
+// Returns done == true after the closing bracket, and ok == false if more input is needed.
+func (d *Decoder) element(k int) (done, ok bool) {
+	s := &d.frames[k]
+	for s.state != frameComma {
+		if !d.space() {
+			return false, false
+		}
+		switch {
+		case s.state == frameStart:
+			d.pConsume('[')
+			s.state = frameFirst
+		case d.chunk[0] == ']':
+			d.chunk = d.chunk[1:]
+			d.frames = d.frames[:k]
+			return true, true
+		case s.state == frameAfter:
+			d.pConsume(',')
+			s.state = frameComma
+		default:
+			s.state = frameValue
+			return false, true
+		}
+	}
+	s.state = frameValue
+	return false, true
+}
+
+// leaf returns a value inside a resumable value, which is parsed by a regular parser from b starting at position N.
+// Returns ok == false if more input is needed. A value contained in the current chunk is parsed from the chunk,
+// otherwise it is collected in the buffer, which is reused for the next one. d.parsed() must be called after parsing.
+func (d *Decoder) leaf() (b *[]byte, N *int, ok bool) {
+	if !d.inner.started && !d.space() {
+		return nil, nil, false
+	}
+	n := 0
+	if !d.inner.scan(d.chunk, &n) {
+		d.pending = append(d.pending, d.chunk...)
+		d.chunk = d.chunk[len(d.chunk):]
+		return nil, nil, false
+	}
+	d.leafN = 0
+	d.leafChunk = n
+	if len(d.pending) == 0 {
+		d.leafValue = d.chunk[:n]
+	} else {
+		d.pending = append(d.pending, d.chunk[:n]...)
+		d.leafValue = d.pending
+		d.pending = d.pending[:0]
+	}
+	return &d.leafValue, &d.leafN, true
+}
+
+// parsed continues after the part of the last leaf that was parsed. That's usually all of it, but as the end of the leaf
+// is found only by the scanner, the parser may stop earlier, e.g. at a quote after a number. The rest is parsed next,
+// like the regular parser of the enclosing object or array would.
+func (d *Decoder) parsed() {
+	rest := len(d.leafValue) - d.leafN
+	if rest <= d.leafChunk {
+		d.chunk = d.chunk[d.leafChunk-rest:]
+		return
+	}
+	// The rest starts in a previous chunk, so it is copied in front of the current chunk
+	d.chunk = append(append([]byte(nil), d.leafValue[d.leafN:len(d.leafValue)-d.leafChunk]...), d.chunk...)
+}
+
+// skip skips over the value of an unknown key, which is validated like pTrimValue would.
+// Returns false if more input is needed.
+func (d *Decoder) skip() bool {
+	b, N, ok := d.leaf()
+	if !ok {
+		return false
+	}
+	if !json.Valid(*b) {
+		panic(ParseError{*b, *N, errSyntax})
+	}
+	// Values nested that deep have more than 100 opening brackets, which are counted quickly
+	if bytes.Count(*b, []byte("["))+bytes.Count(*b, []byte("{")) > 100 {
+		pCheckDepth(*b)
+	}
+	*N = len(*b)
+	d.parsed()
+	return true
+}
+
+// pCheckDepth panics if a valid JSON value b is nested deeper than pTrimValue allows, which is 100 levels
+func pCheckDepth(b []byte) {
+	depth := 0
+	inString, escaped := false, false
+	for i, c := range b {
+		switch {
+		case escaped:
+			escaped = false
+		case inString:
+			escaped = c == '\\'
+			inString = c != '"'
+		case c == '"':
+			inString = true
+		case c == '[' || c == '{':
+			if depth++; depth > 100 {
+				panic(ParseError{b, i, errTooDeep})
+			}
+		case c == ']' || c == '}':
+			depth--
+		}
+	}
+}
+
+// pEachElement parses a JSON array from b starting at position N, calling parse for every element of the array.
+// Function parse must parse exactly one element starting at position N.
+func pEachElement(b *[]byte, N *int, parse func(b *[]byte, N *int)) {
+	trimLeftSpace(b, N)
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	panicEof(b, N, errEofArray)
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		parse(b, N)
+		trimLeftSpace(b, N)
+		panicEof(b, N, errEofArray)
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+
+// arrayReader reads a JSON array from an io.Reader, keeping only the current element in memory.
+type arrayReader struct {
+	r     io.Reader
+	buf   []byte // Buffered input, only buf[start:end] wasn't consumed yet
+	start int
+	end   int
+	eof   bool // Whether r returned io.EOF
+}
+
+// fill reads more input into buf, growing it if it's full. Returns how much the unconsumed input was moved to the left.
+func (a *arrayReader) fill() (shift int) {
+	if a.eof {
+		panic(ParseError{a.buf[a.start:a.end], a.end - a.start, errEofArray})
+	}
+	if a.start > 0 {
+		shift = a.start
+		a.end = copy(a.buf, a.buf[a.start:a.end])
+		a.start = 0
+	}
+	if a.end == len(a.buf) {
+		a.buf = append(a.buf, make([]byte, len(a.buf))...)
+	}
+	n, err := a.r.Read(a.buf[a.end:])
+	a.end += n
+	if err == io.EOF {
+		a.eof = true
+	} else if err != nil {
+		panic(passthroughError{err})
+	}
+	return
+}
+
+// pNextByte skips whitespace and returns the next byte without consuming it
+func (a *arrayReader) pNextByte() byte {
+	for {
+		for ; a.start < a.end; a.start++ {
+			if !isSpace(a.buf[a.start]) {
+				return a.buf[a.start]
+			}
+		}
+		a.fill()
+	}
+}
+
+// pTrimByte skips whitespace and checks if the next byte is equal to c, and skips over it
+func (a *arrayReader) pTrimByte(c byte) {
+	if a.pNextByte() != c {
+		panic(ParseError{a.buf[a.start:a.end], 0, errExpectedByte + string(c) + "`, got: `" + string(a.buf[a.start]) + "`"})
+	}
+	a.start++
+}
+
+// pEachElementReader reads a JSON array from r, calling parse for every element of the array.
+// Every element is read into a reused buffer and parse gets only the bytes of that element, so
+// memory usage is bounded by the size of the largest element, not by the size of the array.
+// Since the buffer is reused, values parsed without copying are valid only until parse returns.
+func pEachElementReader(r io.Reader, parse func(b *[]byte, N *int)) {
+	a := arrayReader{r: r, buf: make([]byte, 64*1024)}
+	a.pTrimByte('[')
+	if a.pNextByte() == ']' {
+		return
+	}
+	for {
+		// Find the end of the element
+		a.pNextByte()
+		var s scanner
+		n := a.start
+		for !s.scan(a.buf[:a.end], &n) {
+			n -= a.fill()
+		}
+		element := a.buf[a.start:n]
+		a.start = n
+		var N int
+		parse(&element, &N)
+		trimLeftSpace(&element, &N)
+		if N != len(element) {
+			panic(ParseError{element, N, errSyntax})
+		}
+		if a.pNextByte() == ']' {
+			return
+		}
+		a.pTrimByte(',')
+	}
+}
+
+// gzipChunkSize is the size of chunks of decompressed data passed to the goroutine calling fn in EachGzipLine
+const gzipChunkSize = 256 * 1024
+
+// gzipQueuedChunks is the number of decompressed chunks of a member that can wait until they are processed.
+// A worker decompressing a member further ahead blocks when its queue is full, which bounds memory usage.
+const gzipQueuedChunks = 4
+
+// gzipMember is a gzip member of compressed data, decompressed by one of the workers in EachGzipLine
+type gzipMember struct {
+	start  int         // Position of the member in compressed data
+	end    int         // Position right after the member in compressed data, set before chunks is closed
+	err    error       // Decompression error, set before chunks is closed
+	chunks chan []byte // Decompressed data, closed after decompression
+}
+
+// gzipChunks decompresses r in chunks of gzipChunkSize bytes and sends them to chunks in order.
+// Buffers are taken from free, if there are any. Returns early if quit is closed.
+func gzipChunks(r io.Reader, chunks chan<- []byte, free chan []byte, quit <-chan struct{}) error {
+	for {
+		var buf []byte
+		select {
+		case buf = <-free:
+		default:
+			buf = make([]byte, gzipChunkSize)
+		}
+		n := 0
+		var err error
+		for n < len(buf) && err == nil {
+			var m int
+			m, err = r.Read(buf[n:])
+			n += m
+		}
+		if n > 0 {
+			select {
+			case chunks <- buf[:n]:
+			case <-quit:
+				return nil
+			}
+		}
+		if err == io.EOF {
+			return nil
+		} else if err != nil {
+			return err
+		}
+	}
+}
+
+// gzipRecycle returns a processed chunk to the free buffers, if there is room for it
+func gzipRecycle(free chan []byte, buf []byte) {
+	select {
+	case free <- buf[:cap(buf)]:
+	default:
+	}
+}
+
+// lineSplitter calls fn for every non-empty line of NDJSON data that arrives in chunks. Lines may span chunks.
+type lineSplitter struct {
+	partial []byte // Beginning of a line that continues in the next chunk
+	fn      func(line []byte) error
+}
+
+// split calls fn for every line that ends in chunk
+func (s *lineSplitter) split(chunk []byte) error {
+	for len(chunk) > 0 {
+		i := bytes.IndexByte(chunk, '\n')
+		if i < 0 {
+			s.partial = append(s.partial, chunk...)
+			return nil
+		}
+		line := chunk[:i]
+		if len(s.partial) > 0 {
+			s.partial = append(s.partial, line...)
+			line = s.partial
+		}
+		chunk = chunk[i+1:]
+		if len(line) > 0 {
+			if err := s.fn(line); err != nil {
+				return err
+			}
+		}
+		s.partial = s.partial[:0]
+	}
+	return nil
+}
+
+// flush calls fn for the last line if it doesn't end with a new line
+func (s *lineSplitter) flush() error {
+	if len(s.partial) > 0 {
+		return s.fn(s.partial)
+	}
+	return nil
+}
+
+// gzipMemberStarts returns positions in data that might be starts of gzip members: the gzip magic number,
+// followed by the deflate compression method and a flag byte with reserved bits unset.
+// The magic number can appear in compressed data too, but decompressing from such a position fails or is
+// discarded, since it isn't the position where the previous member ends.
+func gzipMemberStarts(data []byte, starts chan<- int, quit <-chan struct{}) {
+	defer close(starts)
+	for i := 0; i+4 <= len(data); i++ {
+		j := bytes.Index(data[i:], []byte{0x1f, 0x8b, 8})
+		if j < 0 || i+j+4 > len(data) {
+			return
+		}
+		i += j
+		if data[i+3]&0xe0 == 0 {
+			select {
+			case starts <- i:
+			case <-quit:
+				return
+			}
+		}
+	}
+}
+
+// EachGzipLine decompresses gzip compressed NDJSON data and calls fn for every non-empty line, in order.
+// Members of multi-member gzip data (e.g. written by concatenating gzip files, or by block-based gzip writers)
+// are decompressed concurrently by the given number of workers (GOMAXPROCS if workers <= 0).
+// Every member is decompressed in chunks of gzipChunkSize bytes, which are passed to fn as soon as they are ready,
+// so a single-member file is streamed too. At most gzipQueuedChunks chunks per worker wait to be processed, buffers are reused.
+// Lines may span chunks and members. Function fn is called from the calling goroutine and line is valid only until fn returns.
+// If fn returns an error, decompression stops and the error is returned.
+// If data is corrupt, lines decompressed before the corruption is detected may be passed to fn before the error is returned.
+func EachGzipLine(data []byte, workers int, fn func(line []byte) error) error {
+	if workers <= 0 {
+		workers = runtime.GOMAXPROCS(0)
+	}
+	var wg sync.WaitGroup
+	defer wg.Wait()
+	quit := make(chan struct{}) // Closed on return, stops the goroutines below
+	defer close(quit)
+	free := make(chan []byte, workers*(gzipQueuedChunks+1)) // Processed chunks, reused by the workers
+	jobs := make(chan *gzipMember, workers)                 // Members to decompress, in order of appearance
+	ordered := make(chan *gzipMember, 2*workers)            // Same members, consumed in order below
+	starts := make(chan int)
+	go gzipMemberStarts(data, starts, quit)
+	go func() {
+		defer close(jobs)
+		defer close(ordered)
+		for start := range starts {
+			m := &gzipMember{start: start, chunks: make(chan []byte, gzipQueuedChunks)}
+			select {
+			case jobs <- m:
+			case <-quit:
+				return
+			}
+			select {
+			case ordered <- m:
+			case <-quit:
+				return
+			}
+		}
+	}()
+	for i := 0; i < workers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			var zr gzip.Reader
+			for m := range jobs {
+				r := bytes.NewReader(data[m.start:])
+				if m.err = zr.Reset(r); m.err == nil {
+					zr.Multistream(false)
+					m.err = gzipChunks(&zr, m.chunks, free, quit)
+				}
+				// bytes.Reader is an io.ByteReader, so gzip.Reader doesn't read past the end of the member
+				m.end = len(data) - r.Len()
+				close(m.chunks)
+			}
+		}()
+	}
+
+	lines := lineSplitter{fn: fn}
+	expected := 0 // Position where the next member starts
+	for m := range ordered {
+		if m.start != expected {
+			// Not a real member, the magic number appeared inside compressed data
+			for buf := range m.chunks {
+				gzipRecycle(free, buf)
+			}
+			continue
+		}
+		for buf := range m.chunks {
+			err := lines.split(buf)
+			gzipRecycle(free, buf)
+			if err != nil {
+				return err
+			}
+		}
+		if m.err != nil {
+			return m.err
+		}
+		expected = m.end
+	}
+	if expected != len(data) {
+		if expected == 0 && len(data) > 0 {
+			return gzip.ErrHeader
+		}
+		return errors.New("gzip: invalid data after member ending at position " + strconv.Itoa(expected))
+	}
+	return lines.flush()
+}
+
+// EachGzipLineReader is the same as EachGzipLine, but it reads gzip compressed NDJSON data from r.
+// Data is decompressed by a single goroutine while fn processes the previous chunks, so members are not
+// decompressed concurrently, but the input doesn't have to be in memory and memory usage is bounded.
+func EachGzipLineReader(r io.Reader, fn func(line []byte) error) error {
+	var err error // Decompression error, set before chunks is closed
+	quit := make(chan struct{})
+	chunks := make(chan []byte, gzipQueuedChunks)
+	free := make(chan []byte, gzipQueuedChunks+1)
+	go func() {
+		defer close(chunks)
+		var zr gzip.Reader
+		if err = zr.Reset(r); err == nil {
+			err = gzipChunks(&zr, chunks, free, quit)
+		} else if err == io.EOF {
+			// Empty input
+			err = nil
+		}
+	}()
+	defer func() {
+		// Stop the goroutine above and wait until it no longer reads from r
+		close(quit)
+		for range chunks {
+		}
+	}()
+	lines := lineSplitter{fn: fn}
+	for buf := range chunks {
+		e := lines.split(buf)
+		gzipRecycle(free, buf)
+		if e != nil {
+			return e
+		}
+	}
+	if err != nil {
+		return err
+	}
+	return lines.flush()
+}
@@ -1,6 +1,7 @@
 package gopyjson
 
 import (
+	"io"
 	"unicode/utf8"
 )
 
@@ -47,6 +48,7 @@ func pTrim1(b *[]byte, N *int, v *type3) {
 		nonEmpty = true
 		if len(key) != 1 {
 			pTrimValue(b, N)
+			continue
 		}
 		switch key[0] {
 		case 97:
@@ -127,6 +129,7 @@ func pTrim3(b *[]byte, N *int, v *type3) {
 		nonEmpty = true
 		if len(key) != 1 {
 			pTrimValue(b, N)
+			continue
 		}
 		switch key[0] {
 		case 97:
@@ -210,22 +213,22 @@ func pTrim4(b *[]byte, N *int, v *type5) {
 	pTrimByte(b, N, ']')
 }
 func pTrim5(b *[]byte, N *int, v *type6) {
-	var element [2]float64
 	pTrimByte(b, N, '[')
 	trimLeftSpace(b, N)
 	if *N >= len(*b) {
-		panic(ParseError{*b, *N, "unexpected end of array"})
+		panic(ParseError{*b, *N, errEofArray})
 	}
 	if (*b)[*N] == ']' {
 		*N++
 		return
 	}
-	pTrim4(b, N, (*type5)(&element))
-	*v = append(*v, element)
 	for {
+		var element [2]float64
+		pTrim4(b, N, (*type5)(&element))
+		*v = append(*v, element)
 		trimLeftSpace(b, N)
 		if *N >= len(*b) {
-			panic(ParseError{*b, *N, "unexpected end of array"})
+			panic(ParseError{*b, *N, errEofArray})
 		}
 		if (*b)[*N] == ']' {
 			*N++
@@ -233,8 +236,6 @@ func pTrim5(b *[]byte, N *int, v *type6) {
 		}
 		pTrimByte(b, N, ',')
 		trimLeftSpace(b, N)
-		pTrim4(b, N, (*type5)(&element))
-		*v = append(*v, element)
 	}
 }
 func pTrim6(b *[]byte, N *int, v *type7) {
@@ -325,6 +326,309 @@ func (v *FtxOrderbookSafe) Unmarshal(data []byte) (err error) {
 	pTrim7(b, N, (*type8)(v))
 	return nil
 }
+func iTrim8(b *[]byte, N *int, I *Index, v *type1) {
+	s := I.pTrimStringBytes(b, N)
+	if !utf8.Valid(s) {
+		panic(ParseError{*b, *N, errUTF8})
+	}
+	s, ok := unquoteBytes((*b)[*N - len(s) - 2:*N])
+	if !ok {
+		panic(ParseError{*b, *N, errUnquote})
+	}
+	*v = type1(s)
+}
+func iTrim9(b *[]byte, N *int, I *Index, v *type5) {
+	pTrimByte(b, N, '[')
+	I.trimLeftSpace(b, N)
+	(*v)[0] = pTrimFloat64(b, N)
+	I.trimLeftSpace(b, N)
+	pTrimByte(b, N, ',')
+	I.trimLeftSpace(b, N)
+	(*v)[1] = pTrimFloat64(b, N)
+	I.trimLeftSpace(b, N)
+	pTrimByte(b, N, ']')
+}
+func iTrim10(b *[]byte, N *int, I *Index, v *type6) {
+	pTrimByte(b, N, '[')
+	I.trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		var element [2]float64
+		iTrim9(b, N, I, (*type5)(&element))
+		*v = append(*v, element)
+		I.trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		I.trimLeftSpace(b, N)
+	}
+}
+func iTrim11(b *[]byte, N *int, I *Index, v *type7) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	I.trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			I.trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := I.pTrimKeyColon(b, N)
+		nonEmpty = true
+		switch key {
+		case "time":
+			v.Time = pTrimFloat64(b, N)
+			I.trimLeftSpace(b, N)
+		case "checksum":
+			v.Checksum = pTrimInt64(b, N)
+			I.trimLeftSpace(b, N)
+		case "bids":
+			iTrim10(b, N, I, (*type6)(&v.Bids))
+			I.trimLeftSpace(b, N)
+		case "asks":
+			iTrim10(b, N, I, (*type6)(&v.Asks))
+			I.trimLeftSpace(b, N)
+		case "action":
+			iTrim8(b, N, I, (*type1)(&v.Action))
+			I.trimLeftSpace(b, N)
+		default:
+			I.pTrimValue(b, N)
+		}
+	}
+}
+func iTrim12(b *[]byte, N *int, I *Index, v *type8) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	I.trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			I.trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := I.pTrimKeyColon(b, N)
+		nonEmpty = true
+		switch key {
+		case "channel":
+			iTrim8(b, N, I, (*type1)(&v.Channel))
+			I.trimLeftSpace(b, N)
+		case "market":
+			iTrim8(b, N, I, (*type1)(&v.Market))
+			I.trimLeftSpace(b, N)
+		case "type":
+			iTrim8(b, N, I, (*type1)(&v.Type))
+			I.trimLeftSpace(b, N)
+		case "data":
+			iTrim11(b, N, I, (*type7)(&v.Data))
+			I.trimLeftSpace(b, N)
+		default:
+			I.pTrimValue(b, N)
+		}
+	}
+}
+func (v *FtxOrderbookSafe) UnmarshalIndexed(I *Index) (err error) {
+	b, N, ok := I.nextValue()
+	if !ok {
+		return io.EOF
+	}
+	v.Channel = ""
+	v.Market = ""
+	v.Type = ""
+	v.Data.Time = 0
+	v.Data.Checksum = 0
+	v.Data.Bids = v.Data.Bids[:0]
+	v.Data.Asks = v.Data.Asks[:0]
+	v.Data.Action = ""
+	defer I.skipLineOnError(&err)
+	defer RecoverLater(&err)
+	iTrim12(b, N, I, (*type8)(v))
+	return nil
+}
+func rTrim5(d *Decoder, k int, v *type6) bool {
+	d.enter(k)
+	for {
+		if d.frames[k].state != frameValue {
+			done, ok := d.element(k)
+			if !ok || done {
+				return done
+			}
+			var element [2]float64
+			*v = append(*v, element)
+		}
+		b, N, ok := d.leaf()
+		if !ok {
+			return false
+		}
+		pTrim4(b, N, (*type5)(&(*v)[len(*v)-1]))
+		d.parsed()
+		d.frames[k].state = frameAfter
+	}
+}
+func rTrim6(d *Decoder, k int, v *type7) bool {
+	d.enter(k)
+	for {
+		switch d.frames[k].state {
+		case frameValue:
+			switch d.frames[k].field {
+			case 1:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				v.Time = pTrimFloat64(b, N)
+				d.parsed()
+			case 2:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				v.Checksum = pTrimInt64(b, N)
+				d.parsed()
+			case 3:
+				if !rTrim5(d, k+1, (*type6)(&v.Bids)) {
+					return false
+				}
+			case 4:
+				if !rTrim5(d, k+1, (*type6)(&v.Asks)) {
+					return false
+				}
+			case 5:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				pTrim0(b, N, (*type1)(&v.Action))
+				d.parsed()
+			default:
+				if !d.skip() {
+					return false
+				}
+				d.frames[k].state = frameSkipped
+				continue
+			}
+			d.frames[k].state = frameAfter
+		case frameColon:
+			if !d.colon(k) {
+				return false
+			}
+		default:
+			key, done, ok := d.key(k)
+			if !ok || done {
+				return done
+			}
+			switch string(key) {
+			case "time":
+				d.frames[k].field = 1
+			case "checksum":
+				d.frames[k].field = 2
+			case "bids":
+				d.frames[k].field = 3
+			case "asks":
+				d.frames[k].field = 4
+			case "action":
+				d.frames[k].field = 5
+			default:
+				d.frames[k].field = 0
+			}
+		}
+	}
+}
+func rTrim7(d *Decoder, k int, v *type8) bool {
+	d.enter(k)
+	for {
+		switch d.frames[k].state {
+		case frameValue:
+			switch d.frames[k].field {
+			case 1:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				pTrim0(b, N, (*type1)(&v.Channel))
+				d.parsed()
+			case 2:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				pTrim0(b, N, (*type1)(&v.Market))
+				d.parsed()
+			case 3:
+				b, N, ok := d.leaf()
+				if !ok {
+					return false
+				}
+				pTrim0(b, N, (*type1)(&v.Type))
+				d.parsed()
+			case 4:
+				if !rTrim6(d, k+1, (*type7)(&v.Data)) {
+					return false
+				}
+			default:
+				if !d.skip() {
+					return false
+				}
+				d.frames[k].state = frameSkipped
+				continue
+			}
+			d.frames[k].state = frameAfter
+		case frameColon:
+			if !d.colon(k) {
+				return false
+			}
+		default:
+			key, done, ok := d.key(k)
+			if !ok || done {
+				return done
+			}
+			switch string(key) {
+			case "channel":
+				d.frames[k].field = 1
+			case "market":
+				d.frames[k].field = 2
+			case "type":
+				d.frames[k].field = 3
+			case "data":
+				d.frames[k].field = 4
+			default:
+				d.frames[k].field = 0
+			}
+		}
+	}
+}
+func (v *FtxOrderbookSafe) unmarshalResumable(d *Decoder) (done bool, err error) {
+	if len(d.frames) == 0 {
+		v.Channel = ""
+		v.Market = ""
+		v.Type = ""
+		v.Data.Time = 0
+		v.Data.Checksum = 0
+		v.Data.Bids = v.Data.Bids[:0]
+		v.Data.Asks = v.Data.Asks[:0]
+		v.Data.Action = ""
+	}
+	defer RecoverLater(&err)
+	return rTrim7(d, 0, (*type8)(v)), nil
+}
 type FtxOrderbookUnsafe struct {
 	Channel string
 	Market string
@@ -337,7 +641,7 @@ type FtxOrderbookUnsafe struct {
 		Action string
 	}
 }
-func pTrim8(b *[]byte, N *int, v *type7) {
+func pTrim13(b *[]byte, N *int, v *type7) {
 	var nonEmpty bool
 	pTrimByte(b, N, '{')
 	trimLeftSpace(b, N)
@@ -374,7 +678,7 @@ func pTrim8(b *[]byte, N *int, v *type7) {
 		}
 	}
 }
-func pTrim9(b *[]byte, N *int, v *type8) {
+func pTrim14(b *[]byte, N *int, v *type8) {
 	var nonEmpty bool
 	pTrimByte(b, N, '{')
 	trimLeftSpace(b, N)
@@ -401,7 +705,7 @@ func pTrim9(b *[]byte, N *int, v *type8) {
 			pTrim2(b, N, (*type1)(&v.Type))
 			trimLeftSpace(b, N)
 		case "data":
-			pTrim8(b, N, (*type7)(&v.Data))
+			pTrim13(b, N, (*type7)(&v.Data))
 			trimLeftSpace(b, N)
 		default:
 			pTrimValue(b, N)
@@ -422,6 +726,389 @@ func (v *FtxOrderbookUnsafe) Unmarshal(data []byte) (err error) {
 	N := &n
 	b := &data
 	trimLeftSpace(b, N)
-	pTrim9(b, N, (*type8)(v))
+	pTrim14(b, N, (*type8)(v))
+	return nil
+}
+func iTrim15(b *[]byte, N *int, I *Index, v *type1) {
+	s := I.pTrimStringBytes(b, N)
+	*v = type1(bytesToString(s))
+}
+func iTrim16(b *[]byte, N *int, I *Index, v *type7) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	I.trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			I.trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := I.pTrimKeyColon(b, N)
+		nonEmpty = true
+		switch key {
+		case "time":
+			v.Time = pTrimFloat64(b, N)
+			I.trimLeftSpace(b, N)
+		case "checksum":
+			v.Checksum = pTrimInt64(b, N)
+			I.trimLeftSpace(b, N)
+		case "bids":
+			iTrim10(b, N, I, (*type6)(&v.Bids))
+			I.trimLeftSpace(b, N)
+		case "asks":
+			iTrim10(b, N, I, (*type6)(&v.Asks))
+			I.trimLeftSpace(b, N)
+		case "action":
+			iTrim15(b, N, I, (*type1)(&v.Action))
+			I.trimLeftSpace(b, N)
+		default:
+			I.pTrimValue(b, N)
+		}
+	}
+}
+func iTrim17(b *[]byte, N *int, I *Index, v *type8) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	I.trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			I.trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := I.pTrimKeyColon(b, N)
+		nonEmpty = true
+		switch key {
+		case "channel":
+			iTrim15(b, N, I, (*type1)(&v.Channel))
+			I.trimLeftSpace(b, N)
+		case "market":
+			iTrim15(b, N, I, (*type1)(&v.Market))
+			I.trimLeftSpace(b, N)
+		case "type":
+			iTrim15(b, N, I, (*type1)(&v.Type))
+			I.trimLeftSpace(b, N)
+		case "data":
+			iTrim16(b, N, I, (*type7)(&v.Data))
+			I.trimLeftSpace(b, N)
+		default:
+			I.pTrimValue(b, N)
+		}
+	}
+}
+func (v *FtxOrderbookUnsafe) UnmarshalIndexed(I *Index) (err error) {
+	b, N, ok := I.nextValue()
+	if !ok {
+		return io.EOF
+	}
+	v.Channel = ""
+	v.Market = ""
+	v.Type = ""
+	v.Data.Time = 0
+	v.Data.Checksum = 0
+	v.Data.Bids = v.Data.Bids[:0]
+	v.Data.Asks = v.Data.Asks[:0]
+	v.Data.Action = ""
+	defer I.skipLineOnError(&err)
+	defer RecoverLater(&err)
+	iTrim17(b, N, I, (*type8)(v))
+	return nil
+}
+type type9 []int64
+type Int64Matrix [][]int64
+type type10 Int64Matrix
+func pTrim18(b *[]byte, N *int, v *type9) {
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		var element int64
+		element = pTrimInt64(b, N)
+		*v = append(*v, element)
+		trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+func pTrim19(b *[]byte, N *int, v *type10) {
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		var element []int64
+		pTrim18(b, N, (*type9)(&element))
+		*v = append(*v, element)
+		trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+func (v *Int64Matrix) Unmarshal(data []byte) (err error) {
+	*v = (*v)[:0]
+	defer RecoverLater(&err)
+	var n int
+	N := &n
+	b := &data
+	trimLeftSpace(b, N)
+	pTrim19(b, N, (*type10)(v))
+	return nil
+}
+type Item struct {
+	A int64
+	S string
+}
+type type11 Item
+type Items []Item
+type type12 Items
+func pTrim20(b *[]byte, N *int, v *type11) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := pTrimKeyColon(b, N)
+		nonEmpty = true
+		if len(key) != 1 {
+			pTrimValue(b, N)
+			continue
+		}
+		switch key[0] {
+		case 97:
+			v.A = pTrimInt64(b, N)
+			trimLeftSpace(b, N)
+		case 115:
+			pTrim0(b, N, (*type1)(&v.S))
+			trimLeftSpace(b, N)
+		default:
+			pTrimValue(b, N)
+		}
+	}
+}
+func pTrim21(b *[]byte, N *int, v *type12) {
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		var element Item
+		pTrim20(b, N, (*type11)(&element))
+		*v = append(*v, element)
+		trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+func (v *Items) Unmarshal(data []byte) (err error) {
+	*v = (*v)[:0]
+	defer RecoverLater(&err)
+	var n int
+	N := &n
+	b := &data
+	trimLeftSpace(b, N)
+	pTrim21(b, N, (*type12)(v))
+	return nil
+}
+type type13 struct {
+	Len int
+	Items [2]int64
+	Overflow bool
+}
+type BoundedInts struct {
+	B struct {
+		Len int
+		Items [2]int64
+		Overflow bool
+	}
+}
+type type14 BoundedInts
+func pTrim22(b *[]byte, N *int, v *type13) {
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for {
+		if v.Len == len(v.Items) {
+			v.Overflow = true
+			pTrimValue(b, N)
+		} else {
+			v.Items[v.Len] = 0
+			v.Items[v.Len] = pTrimInt64(b, N)
+			v.Len++
+		}
+		trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+func pTrim23(b *[]byte, N *int, v *type14) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := pTrimKeyColon(b, N)
+		nonEmpty = true
+		if len(key) != 1 {
+			pTrimValue(b, N)
+			continue
+		}
+		switch key[0] {
+		case 98:
+			pTrim22(b, N, (*type13)(&v.B))
+			trimLeftSpace(b, N)
+		default:
+			pTrimValue(b, N)
+		}
+	}
+}
+func (v *BoundedInts) Unmarshal(data []byte) (err error) {
+	v.B.Len = 0
+	v.B.Overflow = false
+	defer RecoverLater(&err)
+	var n int
+	N := &n
+	b := &data
+	trimLeftSpace(b, N)
+	pTrim23(b, N, (*type14)(v))
+	return nil
+}
+func vTrim0(b *[]byte, N *int) {
+	pTrimByte(b, N, '[')
+	trimLeftSpace(b, N)
+	if *N >= len(*b) {
+		panic(ParseError{*b, *N, errEofArray})
+	}
+	if (*b)[*N] == ']' {
+		*N++
+		return
+	}
+	for n := 0; ; n++ {
+		if n >= 2 {
+			pTrimValue(b, N)
+		} else {
+			pTrimInt64(b, N)
+		}
+		trimLeftSpace(b, N)
+		if *N >= len(*b) {
+			panic(ParseError{*b, *N, errEofArray})
+		}
+		if (*b)[*N] == ']' {
+			*N++
+			return
+		}
+		pTrimByte(b, N, ',')
+		trimLeftSpace(b, N)
+	}
+}
+func vTrim1(b *[]byte, N *int) {
+	var nonEmpty bool
+	pTrimByte(b, N, '{')
+	trimLeftSpace(b, N)
+	for {
+		c := pNextByte(b, N)
+		if c == '}' {
+			break
+		}
+		if nonEmpty && c == ',' {
+			trimLeftSpace(b, N)
+			c = pNextByte(b, N)
+		}
+		*N--
+		key := pTrimKeyColon(b, N)
+		nonEmpty = true
+		if len(key) != 1 {
+			pTrimValue(b, N)
+			continue
+		}
+		switch key[0] {
+		case 98:
+			vTrim0(b, N)
+			trimLeftSpace(b, N)
+		default:
+			pTrimValue(b, N)
+		}
+	}
+}
+func ValidateBoundedInts(data []byte) (err error) {
+	defer RecoverLater(&err)
+	var n int
+	N := &n
+	b := &data
+	trimLeftSpace(b, N)
+	vTrim1(b, N)
 	return nil
 }
\ No newline at end of file
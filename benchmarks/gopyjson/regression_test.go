@@ -0,0 +1,122 @@
+// Regression tests of generated parsers, run with "go test ./gopyjson" from the benchmarks directory.
+// The package is regenerated by generate.py, which doesn't touch this file.
+
+package gopyjson
+
+import (
+	"fmt"
+	"io"
+	"reflect"
+	"testing"
+)
+
+// Keys of other lengths must be skipped without reaching the switch on the first byte of single-byte keys
+func TestUnknownMultiByteKeys(t *testing.T) {
+	var v BinanceAggTradeSafe
+	data := `{"a":1,"xyz":{"a":2,"p":"x"},"p":"0.1","":[1,"q"],"pq":true,"M":true}`
+	if err := v.Unmarshal([]byte(data)); err != nil {
+		t.Fatalf("%s: %v", data, err)
+	}
+	if v.A != 1 || v.p != "0.1" || !v.M {
+		t.Errorf("%s: unexpected result %+v", data, v)
+	}
+}
+
+// Every element of a slice starts from zero, so nested slices don't share memory and
+// struct elements don't keep values of keys missing from later elements
+func TestSliceElements(t *testing.T) {
+	var matrix Int64Matrix
+	data := `[[1],[2,3],[]]`
+	if err := matrix.Unmarshal([]byte(data)); err != nil {
+		t.Fatalf("%s: %v", data, err)
+	}
+	if expected := (Int64Matrix{{1}, {2, 3}, nil}); !reflect.DeepEqual(matrix, expected) {
+		t.Errorf("%s: got %v, expected %v", data, matrix, expected)
+	}
+	var items Items
+	data = `[{"a":1,"s":"x"},{"s":"y"},{}]`
+	if err := items.Unmarshal([]byte(data)); err != nil {
+		t.Fatalf("%s: %v", data, err)
+	}
+	if expected := (Items{{1, "x"}, {0, "y"}, {0, ""}}); !reflect.DeepEqual(items, expected) {
+		t.Errorf("%s: got %v, expected %v", data, items, expected)
+	}
+}
+
+// Validation must agree with parsing, also for elements of a bounded slice past the first skipped one
+func TestValidateBoundedSliceOverflow(t *testing.T) {
+	for _, data := range []string{
+		`{"b":[1,2,3,4,5]}`,
+		`{"b":[1,2,3,"x"]}`,
+		`{"b":[1,2,3,{"x":[true]},null]}`,
+		`{"b":[1,2,3,]}`,
+		`{"b":[1,"x",3,4]}`,
+	} {
+		var v BoundedInts
+		unmarshalErr := v.Unmarshal([]byte(data))
+		validateErr := ValidateBoundedInts([]byte(data))
+		if (unmarshalErr == nil) != (validateErr == nil) {
+			t.Errorf("%s: Unmarshal returned %v, ValidateBoundedInts returned %v", data, unmarshalErr, validateErr)
+		}
+	}
+}
+
+// Indexed parsing of NDJSON must agree with Unmarshal line by line, including unknown keys, escaped quotes,
+// whitespace and malformed lines, after which parsing continues at the next line
+func TestIndexedLines(t *testing.T) {
+	lines := []string{
+		`{"channel":"a\\\"b","x":{"y":["\"]}",[]]},"data":{"bids":[[1,2]],"action":"\\"}}`,
+		`{"market": "m", "data": {"time": 1.5, "asks": [ [3, 4] , [5,6] ] } , "type" : "t"}`,
+		`{"channel":"c","data":{"bids":[[1,"x"]]}}`,
+		`{"x":"\\" "channel":"c"}`,
+		`{"channel":"d"}`,
+	}
+	var block []byte
+	for _, line := range lines {
+		block = append(block, "  "+line+" \r\n"...)
+	}
+	var index Index
+	index.Build(block)
+	for _, line := range lines {
+		var v, expected FtxOrderbookSafe
+		err := v.UnmarshalIndexed(&index)
+		expectedErr := expected.Unmarshal([]byte(line))
+		if (err == nil) != (expectedErr == nil) || !reflect.DeepEqual(v, expected) && err == nil {
+			t.Errorf("%s: parsed %+v, %v, Unmarshal parsed %+v, %v", line, v, err, expected, expectedErr)
+		}
+	}
+	var v FtxOrderbookSafe
+	if err := v.UnmarshalIndexed(&index); err != io.EOF {
+		t.Errorf("expected io.EOF after the last line, got %v", err)
+	}
+}
+
+// A Decoder must parse a large value fed in small chunks as the chunks arrive, buffering only leaves spanning chunks
+func TestDecoderResumable(t *testing.T) {
+	data := []byte(`{"channel":"orderbook","market":"BTC-PERP","type":"partial","data":{"bids":[`)
+	for i := 0; i < 1000; i++ {
+		data = append(data, fmt.Sprintf("[%d.5,%d],", 20000+i, i)...)
+	}
+	data = append(data, `[1,2]],"asks":[],"checksum":123,"time":1.5,"action":"partial"}}`...)
+	var expected FtxOrderbookSafe
+	if err := expected.Unmarshal(data); err != nil {
+		t.Fatal(err)
+	}
+	var d Decoder
+	var v FtxOrderbookSafe
+	err := ErrNeedMore
+	for n := 0; n < len(data) && err == ErrNeedMore; n += 16 {
+		end := n + 16
+		if end > len(data) {
+			end = len(data)
+		}
+		d.Feed(data[n:end])
+		err = d.Decode(&v)
+	}
+	if err != nil || !reflect.DeepEqual(v, expected) {
+		t.Fatalf("decoded %d bids, %v, expected %d bids", len(v.Data.Bids), err, len(expected.Data.Bids))
+	}
+	if cap(d.pending) > 64 {
+		t.Errorf("%d bytes buffered while decoding", cap(d.pending))
+	}
+}
@@ -0,0 +1,54 @@
+# Collects CPU profiles of the gopyjson benchmarks and merges them into default.pgo for profile-guided optimization,
+# then compares benchmark results built without and with the profile using benchmark_average.py.
+# Run from the benchmarks directory after generating the data: python pgo.py
+# Go (1.21+) uses default.pgo only from the directory of the main package, which for "go test" is the tested package,
+# so the profile is saved next to benchmark_test.go and applies to the generated parsers in benchmarks/gopyjson.
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+parser = argparse.ArgumentParser(description='Builds default.pgo from benchmark CPU profiles and compares PGO on/off.')
+parser.add_argument('--workload', action='append', metavar='PATTERN',
+                    help='benchmark pattern of a workload to profile, can be repeated '
+                         '(default: Benchmark1Gopyjson, Benchmark2Gopyjson)')
+parser.add_argument('--benchtime', default='100000x', help='-benchtime of every benchmark run')
+parser.add_argument('--count', type=int, default=10, help='-count of the PGO on/off comparison')
+parser.add_argument('--output', default='default.pgo', help='path of the merged profile')
+parser.add_argument('--no-compare', action='store_true', help='only collect the profile')
+args = parser.parse_args()
+workloads = args.workload or ['Benchmark1Gopyjson', 'Benchmark2Gopyjson']
+average = Path(__file__).with_name('benchmark_average.py')
+
+
+def go_test(*flags: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(['go', 'test', '-run', '^$', '-benchtime', args.benchtime, *flags], check=True, **kwargs)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    # Profiles are collected from binaries built without PGO, so the previous profile doesn't affect the new one
+    profiles = []
+    for i, workload in enumerate(workloads):
+        profiles.append(str(Path(tmp, f'{i}.pprof')))
+        print(f'profiling {workload}', file=sys.stderr)
+        go_test('-bench', workload, '-pgo=off', '-cpuprofile', profiles[-1], '-o', str(Path(tmp, 'benchmarks.test')),
+                stdout=subprocess.DEVNULL)
+    with open(args.output, 'wb') as f:
+        subprocess.run(['go', 'tool', 'pprof', '-proto', *profiles], check=True, stdout=f)
+    print(f'saved merged profile to {args.output}', file=sys.stderr)
+    if args.no_compare:
+        sys.exit()
+
+    # PGO off is saved as the baseline, PGO on is compared to it. The profile must be default.pgo in the
+    # tested package to be used, otherwise it is passed explicitly.
+    baseline = str(Path(tmp, 'pgo-off.json'))
+    pgo = 'auto' if Path(args.output).resolve() == Path('default.pgo').resolve() else str(Path(args.output).resolve())
+    pattern = '|'.join(workloads)
+    for flag, average_args in (('-pgo=off', ['--save', baseline]), ('-pgo=' + pgo, ['--compare', baseline])):
+        print(f'\n{flag}', file=sys.stderr)
+        results = go_test('-bench', pattern, '-benchmem', '-count', str(args.count), flag,
+                          stdout=subprocess.PIPE, text=True).stdout
+        # Regressions of PGO builds are reported by benchmark_average.py, but they don't make this script fail
+        subprocess.run([sys.executable, str(average), *average_args], input=results, text=True)
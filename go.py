@@ -20,6 +20,7 @@ class File:
         self.imports: dict[str, str] = {}  # List of packages to import as a mapping package -> alias
         self.buffer = ''
         self.indent = 0
+        self.header = ''  # Written before the package clause, e.g. a build constraint followed by an empty line
 
     def __enter__(self):
         assert File.current is None  # Nested file context managers not allowed
@@ -27,7 +28,7 @@ class File:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         with open(self.filepath, 'w') as f:
-            f.write('package ' + self.package_name + '\n')
+            f.write(self.header + 'package ' + self.package_name + '\n')
             if self.imports:
                 f.write('\nimport (\n')
                 for package, alias in sorted(self.imports.items()):
@@ -192,3 +193,12 @@ def Func(s: str):
     wl('func ' + s + ' ')
     with Braces():
         yield
+
+
+# Redirects the code generated inside the "with" block to another file, e.g. tests generated along with the parsers
+@contextmanager
+def Into(file: File):
+    previous = File.current
+    File.current = file
+    yield
+    File.current = previous
@@ -1,13 +1,19 @@
 package gopyjson
 
 import (
+	"bytes"
+	"compress/gzip"
+	"errors"
 	"fmt"
+	"io"
 	"math"
+	"math/rand"
 	"reflect"
 	"runtime"
 	"strconv"
 	"strings"
 	"testing"
+	"testing/iotest"
 )
 
 type panicCheck func(error) bool
@@ -301,10 +307,14 @@ func TestTrimValue(t *testing.T) {
 	}
 	test(t, f, "", 0, checkParseError(errEofValue))
 	test(t, f, "}", 0, checkParseError(errSyntax))
+	test(t, f, "]", 0, checkParseError(errSyntax))
 	test(t, f, ",", 0, checkParseError(errSyntax))
 	test(t, f, "1,", 1, nil)
 	test(t, f, "1 ,", 2, nil)
 	test(t, f, "1}", 1, nil)
+	test(t, f, "1 ]", 2, nil)
+	test(t, f, `{"a":[1]}]`, 9, nil)
+	test(t, f, "[1}]", 2, checkParseError(errSyntax))
 	test(t, f, "[],", 2, nil)
 	test(t, f, "[1,2],", 5, nil)
 	test(t, f, "[]}", 2, nil)
@@ -330,3 +340,468 @@ func TestTrimValue(t *testing.T) {
 	test(t, f, nested("{", "}", 100)+",", 200, checkParseError(errSyntax))
 	test(t, f, nested("{", "}", 101)+",", 100, checkParseError(errTooDeep))
 }
+
+func TestTrimRaw(t *testing.T) {
+	f := func(s string) (raw string, N int, err error) {
+		defer recoverError(&err)
+		b := []byte(s)
+		raw = string(pTrimRaw(&b, &N))
+		return
+	}
+	test(t, f, "", "", 0, checkParseError(errEofValue))
+	test(t, f, "1", "1", 1, nil)
+	test(t, f, "-1.5e3 ,", "-1.5e3", 6, nil)
+	test(t, f, "true}", "true", 4, nil)
+	test(t, f, "null]", "null", 4, nil)
+	test(t, f, "tru,", "", 3, checkParseError(errSyntax))
+	test(t, f, ",", "", 0, checkParseError(errSyntax))
+	test(t, f, `"a\"]"`, `"a\"]"`, 6, nil)
+	test(t, f, `"a`, "", 2, checkParseError(errEofCloseQuote))
+	test(t, f, `{"a": [1, {"b": "]}"}], "c": {}} ,`, `{"a": [1, {"b": "]}"}], "c": {}}`, 32, nil)
+	test(t, f, `[[],{}]`, `[[],{}]`, 7, nil)
+	test(t, f, `[}`, "", 2, checkParseError(errSyntax))
+	test(t, f, `[1,]`, "", 4, checkParseError(errSyntax))
+	test(t, f, `[[1]`, "", 4, checkParseError(errEofValue))
+	test(t, f, `}`, "", 0, checkParseError(errSyntax))
+}
+
+func TestValidQuoted(t *testing.T) {
+	f := func(s string) (valid bool, err error) {
+		_, ok := unquoteBytes([]byte(s))
+		valid = validQuoted([]byte(s))
+		if valid != ok {
+			err = fmt.Errorf("unquoteBytes returned %v", ok)
+		}
+		return
+	}
+	test(t, f, `""`, true, nil)
+	test(t, f, `"abc"`, true, nil)
+	test(t, f, "\"a\tb\"", false, nil)
+	test(t, f, `"a\tb\u00e9\"\\"`, true, nil)
+	test(t, f, `"a\x"`, false, nil)
+	test(t, f, `"\u12"`, false, nil)
+	test(t, f, "\"\\n\x01\"", false, nil)
+}
+
+// rawValue is an Unmarshaler that saves the value it was given, used for testing the Decoder
+type rawValue []byte
+
+func (v *rawValue) Unmarshal(data []byte) error {
+	*v = append((*v)[:0], bytes.TrimSpace(data)...)
+	if len(*v) > 0 && (*v)[0] == '!' {
+		return errors.New("invalid value")
+	}
+	return nil
+}
+
+// refValue is an Unmarshaler that keeps a reference to the value it was given, like zero-copy parsers do
+type refValue []byte
+
+func (v *refValue) Unmarshal(data []byte) error {
+	*v = bytes.TrimSpace(data)
+	return nil
+}
+
+func TestDecoder(t *testing.T) {
+	long := `["xxxxxxxxxxxxxxxxxxxx\\\"yyyyyyyyyy]", {"zzzzzzzzzzzzzzzz": 12345678912345}]`
+	input := `{"a":"}\"{","b":[1,{"c":[]}]} [1,"]"]` + "\n" + `"x\\" 12 true` + "\n" + ` !x {}` + long + "\n"
+	expected := []string{`{"a":"}\"{","b":[1,{"c":[]}]}`, `[1,"]"]`, `"x\\"`, `12`, `true`, `!x`, `{}`, long}
+	// decode feeds the input split into chunks at the given positions and returns the decoded values
+	decode := func(splits ...int) (values []string) {
+		var d Decoder
+		var v rawValue
+		prev := 0
+		for _, i := range append(splits, len(input)) {
+			d.Feed([]byte(input[prev:i]))
+			prev = i
+			for {
+				err := d.Decode(&v)
+				if err == ErrNeedMore {
+					break
+				}
+				values = append(values, string(v))
+			}
+		}
+		return
+	}
+	check := func(values []string, splits ...int) {
+		if fmt.Sprint(values) != fmt.Sprint(expected) {
+			t.Errorf("splits %v: decoded %q, expected %q", splits, values, expected)
+		}
+	}
+	check(decode())
+	for i := 0; i <= len(input); i++ {
+		check(decode(i), i)
+		for j := i; j <= len(input); j += 7 {
+			check(decode(i, j), i, j)
+		}
+	}
+	// Feed can be called before the previous chunk was consumed
+	var d Decoder
+	var v rawValue
+	d.Feed([]byte(`[1] [`))
+	d.Feed([]byte(`2] `))
+	var values []string
+	for d.Decode(&v) != ErrNeedMore {
+		values = append(values, string(v))
+	}
+	if fmt.Sprint(values) != "[[1] [2]]" {
+		t.Errorf("decoded %q", values)
+	}
+	// Values referencing the internal buffer stay valid until the next Decode, even if more input is fed
+	d = Decoder{}
+	var ref refValue
+	d.Feed([]byte(`["aaaa"`))
+	err := d.Decode(&ref)
+	d.Feed([]byte(`] ["bbbb"] `))
+	d.Feed([]byte(` ["cc`))
+	if err == ErrNeedMore {
+		err = d.Decode(&ref)
+	}
+	d.Feed([]byte(`cc"]`))
+	if err != nil || string(ref) != `["aaaa"]` {
+		t.Errorf("decoded %q, %v", ref, err)
+	}
+	err = d.Decode(&ref)
+	d.Feed([]byte(` ["dddd"] `))
+	if err != nil || string(ref) != `["bbbb"]` {
+		t.Errorf("decoded %q, %v", ref, err)
+	}
+	err = d.Decode(&ref)
+	d.Feed([]byte(` ["eeee"] `))
+	if err != nil || string(ref) != `["cccc"]` {
+		t.Errorf("decoded %q, %v", ref, err)
+	}
+}
+
+func TestDecoderFlush(t *testing.T) {
+	// flush feeds the input and returns values decoded by Decode and Flush, and the error that ended Flush
+	flush := func(input ...string) (values []string, err error) {
+		var d Decoder
+		var v rawValue
+		for _, chunk := range input {
+			d.Feed([]byte(chunk))
+			for d.Decode(&v) != ErrNeedMore {
+				values = append(values, string(v))
+			}
+		}
+		for {
+			if err = d.Flush(&v); err != nil {
+				return
+			}
+			values = append(values, string(v))
+		}
+	}
+	f := func(input string) (values string, err error) {
+		decoded, err := flush(input[:len(input)/2], input[len(input)/2:])
+		return fmt.Sprint(decoded), err
+	}
+	var eof panicCheck = func(err error) bool {
+		return err == io.EOF
+	}
+	var unexpectedEof panicCheck = func(err error) bool {
+		return err == io.ErrUnexpectedEOF
+	}
+	test(t, f, "", "[]", eof)
+	test(t, f, " \n ", "[]", eof)
+	test(t, f, "1 [2]", "[1 [2]]", eof)
+	test(t, f, "[1] 23", "[[1] 23]", eof)
+	test(t, f, "12345", "[12345]", eof)
+	test(t, f, `true null "x"`, `[true null "x"]`, eof)
+	test(t, f, `1 {"a":`, "[1]", unexpectedEof)
+	test(t, f, `1 "ab`, "[1]", unexpectedEof)
+}
+
+func TestEachElement(t *testing.T) {
+	// Parses an array of integers using both pEachElement and pEachElementReader
+	F := []func(string) (string, error){
+		func(s string) (result string, err error) {
+			defer recoverError(&err)
+			b := []byte(s)
+			var N int
+			pEachElement(&b, &N, func(b *[]byte, N *int) {
+				result += fmt.Sprint(pTrimInt64(b, N), ";")
+			})
+			return
+		},
+		func(s string) (result string, err error) {
+			defer recoverError(&err)
+			pEachElementReader(iotest.OneByteReader(strings.NewReader(s)), func(b *[]byte, N *int) {
+				result += fmt.Sprint(pTrimInt64(b, N), ";")
+			})
+			return
+		},
+	}
+	var eof panicCheck = func(err error) bool {
+		return checkParseError(errEof)(err) || checkParseError(errEofArray)(err)
+	}
+	for _, f := range F {
+		// Valid
+		test(t, f, "[]", "", nil)
+		test(t, f, " [ ] ", "", nil)
+		test(t, f, "[1]", "1;", nil)
+		test(t, f, "[1,2,3]", "1;2;3;", nil)
+		test(t, f, " [ 1 , -2 ,3 ]", "1;-2;3;", nil)
+		// Invalid
+		test(t, f, "", "", eof)
+		test(t, f, "[", "", eof)
+		test(t, f, "[1,", "1;", eof)
+		test(t, f, "[1 2]", "1;", checkParseError(errExpectedByte))
+		test(t, f, "[x]", "", checkParseError(errExpectedInt))
+	}
+}
+
+func TestSwar(t *testing.T) {
+	// Compare SWAR functions to byte by byte implementations for every possible byte at every position
+	var block [8]byte
+	for i := 0; i < 8; i++ {
+		for c := 0; c < 256; c++ {
+			copy(block[:], "abcdefgh")
+			block[i] = byte(c)
+			x := swarLoad(block[:], 0)
+			if mask := swarEqual(x, '"'); (mask != 0) != (c == '"') || (mask != 0 && swarFirst(mask) != i) {
+				t.Errorf("swarEqual(%q, '\"') = %x", block, mask)
+			}
+			structural := strings.IndexByte(`{}[],"`, byte(c)) >= 0
+			if mask := swarStructural(x); structural && mask == 0 {
+				t.Errorf("swarStructural(%q) = 0", block)
+			}
+		}
+	}
+	// Strings with quotes and backslashes at every position relative to 8-byte blocks
+	f := func(s string) (t string, N int, err error) {
+		defer recoverError(&err)
+		b := []byte(s)
+		t = string(pTrimStringBytes(&b, &N))
+		return
+	}
+	g := func(s string) (N int, err error) {
+		defer recoverError(&err)
+		b := []byte(s)
+		pTrimValue(&b, &N)
+		return
+	}
+	for i := 0; i < 20; i++ {
+		prefix := strings.Repeat("x", i)
+		test(t, f, `"`+prefix+`"`, prefix, i+2, nil)
+		test(t, f, `"`+prefix+`\""`, prefix+`\"`, i+4, nil)
+		test(t, f, `"`+prefix+`\\"`, prefix+`\\`, i+4, nil)
+		test(t, f, `"`+prefix+`\\\"`+prefix+`"`, prefix+`\\\"`+prefix, 2*i+6, nil)
+		test(t, f, `"`+prefix, ``, i+1, checkParseError(errEofCloseQuote))
+		test(t, g, `["`+prefix+`,"]`+prefix+`x,`, 2*i+6, checkParseError(errSyntax))
+		test(t, g, `["`+prefix+`,", 123456789`+prefix+`x]}`, 2*i+17, checkParseError(errSyntax))
+		test(t, g, `["`+prefix+`,", 123456789]`+strings.Repeat(" ", i)+`,`, 2*i+16, nil)
+	}
+}
+
+// indexEntries is a byte by byte implementation of Index.Build, returns the entries of the index of data
+func indexEntries(data []byte) (entries []uint32) {
+	inString, escaped, boundary := false, false, true
+	for i, c := range data {
+		quote := c == '"' && !escaped
+		escaped = c == '\\' && !escaped
+		switch {
+		case quote:
+			inString = !inString
+			if inString {
+				entries = append(entries, uint32(i)|indexOpenQuote)
+			} else {
+				entries = append(entries, uint32(i))
+			}
+			boundary = true
+		case inString:
+		case strings.IndexByte("{}[]:,", c) >= 0:
+			entries = append(entries, uint32(i))
+			boundary = true
+		case isSpace(c):
+			boundary = true
+		default:
+			if boundary || c == '\\' {
+				entries = append(entries, uint32(i))
+			}
+			boundary = false
+		}
+	}
+	return
+}
+
+func TestIndex(t *testing.T) {
+	// Compare SWAR functions used by the index to byte by byte implementations for every possible byte at every position
+	var block [8]byte
+	for i := 0; i < 8; i++ {
+		for c := 0; c < 256; c++ {
+			copy(block[:], "a\" \\,\t{\x80")
+			block[i] = byte(c)
+			x := swarLoad(block[:], 0)
+			quotes, spaces := swarMoveMask(swarBytes(x, '"')), swarMoveMask(swarSpace(x))
+			for j := 0; j < 8; j++ {
+				if (quotes>>j&1 == 1) != (block[j] == '"') || (spaces>>j&1 == 1) != isSpace(block[j]) {
+					t.Fatalf("%q: quotes %08b, spaces %08b", block, quotes, spaces)
+				}
+			}
+		}
+	}
+	// call calls f at position n of data, returns the position after the call and what went wrong, if anything
+	call := func(f func(b *[]byte, N *int), data []byte, n int) (int, string) {
+		var err error
+		func() {
+			defer recoverError(&err)
+			f(&data, &n)
+		}()
+		if err != nil {
+			return n, err.(ParseError).what
+		}
+		return n, ""
+	}
+	// Random input made of characters that matter to the index, compared to indexEntries,
+	// and indexed helpers called at every position compared to helpers that don't use the index
+	rng := rand.New(rand.NewSource(1))
+	alphabet := "{}[]:,\"\\\"\\ \t\n    ab1"
+	for iteration := 0; iteration < 1000; iteration++ {
+		data := make([]byte, rng.Intn(300))
+		for i := range data {
+			data[i] = alphabet[rng.Intn(len(alphabet))]
+		}
+		var x Index
+		x.Build(data)
+		if expected := indexEntries(data); fmt.Sprint(x.entries) != fmt.Sprint(expected) {
+			t.Fatalf("%q: entries %v, expected %v", data, x.entries, expected)
+		}
+		for n := 0; n <= len(data); n++ {
+			var s, expectedS string
+			helpers := []struct {
+				name            string
+				indexed, helper func(b *[]byte, N *int)
+			}{
+				{"trimLeftSpace", x.trimLeftSpace, trimLeftSpace},
+				{"pTrimStringBytes",
+					func(b *[]byte, N *int) { s = string(x.pTrimStringBytes(b, N)) },
+					func(b *[]byte, N *int) { expectedS = string(pTrimStringBytes(b, N)) }},
+				{"pTrimValue", x.pTrimValue, pTrimValue},
+			}
+			for _, h := range helpers {
+				N, what := call(h.indexed, data, n)
+				expectedN, expectedWhat := call(h.helper, data, n)
+				if N != expectedN || what != expectedWhat || s != expectedS {
+					t.Fatalf("%q at %d: indexed %s returned %d %q %q, expected %d %q %q",
+						data, n, h.name, N, what, s, expectedN, expectedWhat, expectedS)
+				}
+			}
+		}
+	}
+}
+
+func TestEachGzipLine(t *testing.T) {
+	// gzipMembers compresses every part into a separate gzip member and concatenates the members
+	gzipMembers := func(level int, parts ...string) []byte {
+		var buf bytes.Buffer
+		for _, part := range parts {
+			w, _ := gzip.NewWriterLevel(&buf, level)
+			w.Write([]byte(part))
+			w.Close()
+		}
+		return buf.Bytes()
+	}
+	// Tests both EachGzipLine and EachGzipLineReader, which ignores the number of workers
+	F := []func([]byte, int, func([]byte) error) error{
+		EachGzipLine,
+		func(data []byte, workers int, fn func([]byte) error) error {
+			return EachGzipLineReader(iotest.HalfReader(bytes.NewReader(data)), fn)
+		},
+	}
+	for _, each := range F {
+		f := func(data []byte, workers int) (result string, err error) {
+			err = each(data, workers, func(line []byte) error {
+				if string(line) == "stop" {
+					return errors.New("stopped")
+				}
+				result += string(line) + ";"
+				return nil
+			})
+			return
+		}
+		// Lines spanning members, empty members and a gzip magic number inside uncompressed data
+		parts := []string{"a\nb", "", "c\n\n", "d\x1f\x8b\x08\x00e\n", "f\ng", "h"}
+		for _, workers := range []int{0, 1, 2, 8} {
+			for _, level := range []int{gzip.NoCompression, gzip.BestSpeed} {
+				test(t, f, gzipMembers(level, parts...), workers, "a;bc;d\x1f\x8b\x08\x00e;f;gh;", nil)
+				test(t, f, gzipMembers(level, parts[0]), workers, "a;b;", nil)
+				test(t, f, gzipMembers(level, append(parts, "\nstop\nx\n")...), workers, "a;bc;d\x1f\x8b\x08\x00e;f;gh;", panicCheck(func(err error) bool {
+					return err.Error() == "stopped"
+				}))
+			}
+			var many []string
+			var expected string
+			for i := 0; i < 300; i++ {
+				many = append(many, strings.Repeat(strconv.Itoa(i), i%7)+"\n")
+				if i%7 > 0 {
+					expected += strings.Repeat(strconv.Itoa(i), i%7) + ";"
+				}
+			}
+			test(t, f, gzipMembers(gzip.BestSpeed, many...), workers, expected, nil)
+			// Members larger than a chunk, with lines spanning chunks
+			large := strings.Repeat("0123456789abcdef", gzipChunkSize/16-1) + "\n" + strings.Repeat("x", 100) + "\n"
+			test(t, f, gzipMembers(gzip.BestSpeed, large, large[:gzipChunkSize], large[gzipChunkSize:]), workers,
+				strings.ReplaceAll(large+large, "\n", ";"), nil)
+			// Invalid data, lines before the corruption are passed to fn
+			isError := panicCheck(func(err error) bool { return true })
+			test(t, f, []byte{}, workers, "", nil)
+			test(t, f, []byte("abc"), workers, "", isError)
+			test(t, f, append(gzipMembers(gzip.BestSpeed, "a\n"), 'x'), workers, "a;", isError)
+			corrupt := gzipMembers(gzip.BestSpeed, "a\n", "bbbbbbbbbbbbbbbbbb\n", "c\n")
+			corrupt[len(corrupt)-31]++ // Checksum of the second member
+			test(t, f, corrupt, workers, "a;bbbbbbbbbbbbbbbbbb;", panicCheck(func(err error) bool { return err == gzip.ErrChecksum }))
+		}
+
+		// Lines are passed to fn while a large single member is still being decompressed
+		var lines []string
+		for i := 0; i < 100000; i++ {
+			lines = append(lines, strconv.Itoa(i*i))
+		}
+		data := gzipMembers(gzip.BestSpeed, strings.Join(lines, "\n"))
+		n := 0
+		err := each(data[:len(data)/2], 1, func(line []byte) error {
+			if string(line) != lines[n] {
+				return fmt.Errorf("line %d is %q, expected %q", n, line, lines[n])
+			}
+			n++
+			return nil
+		})
+		if err != io.ErrUnexpectedEOF || n < gzipChunkSize/8 {
+			t.Errorf("truncated data: %d lines, error %v", n, err)
+		}
+	}
+}
+
+func TestFuzzHelpers(t *testing.T) {
+	keys := map[string]bool{"a": true, "bc": true}
+	comparable := func(data string) (bool, error) {
+		return fuzzComparable([]byte(data), keys), nil
+	}
+	test(t, comparable, `{"a":1,"bc":[{"a":2},{"a":3}],"d":{"a":{}}}`, true, nil)
+	test(t, comparable, `[{"a":1},{"a":1}]`, true, nil)
+	test(t, comparable, `{"a": "bc", "x": "A"}`, true, nil)
+	test(t, comparable, `{"a":1}`, true, nil)
+	test(t, comparable, `{"a":1,`, true, nil)
+	test(t, comparable, `{"a":1,"a":2}`, false, nil)
+	test(t, comparable, `{"bc":{"a":1,"a":2}}`, false, nil)
+	test(t, comparable, `{"A":1}`, false, nil)
+	test(t, comparable, `{"bC":1}`, false, nil)
+	test(t, comparable, `{"\u0061":1}`, false, nil)
+	type mirror struct {
+		A []int
+		B map[string]int
+		C [2]string
+		D int `json:"-"`
+	}
+	equal := func(a, b mirror) (bool, error) {
+		return fuzzEqual(reflect.ValueOf(a), reflect.ValueOf(b)), nil
+	}
+	test(t, equal, mirror{}, mirror{A: []int{}, B: map[string]int{}, D: 1}, true, nil)
+	test(t, equal, mirror{A: []int{1}}, mirror{A: []int{1}}, true, nil)
+	test(t, equal, mirror{A: []int{1}}, mirror{A: []int{2}}, false, nil)
+	test(t, equal, mirror{A: []int{1}}, mirror{A: []int{1, 2}}, false, nil)
+	test(t, equal, mirror{B: map[string]int{"a": 1}}, mirror{B: map[string]int{"a": 1}}, true, nil)
+	test(t, equal, mirror{B: map[string]int{"a": 1}}, mirror{B: map[string]int{"b": 1}}, false, nil)
+	test(t, equal, mirror{C: [2]string{"a", "b"}}, mirror{C: [2]string{"a", "c"}}, false, nil)
+}
@@ -0,0 +1,104 @@
+// This file contains helpers used by generated tests, it is copied next to generated code together with common.go.
+// Generated fuzz targets compare values unmarshaled by gopyjson to values unmarshaled by encoding/json,
+// or values unmarshaled by two different gopyjson methods.
+
+package gopyjson
+
+import (
+	"bytes"
+	"encoding/json"
+	"fmt"
+	"reflect"
+	"strings"
+)
+
+// fuzzComparable checks if gopyjson and encoding/json are expected to unmarshal data in the same way.
+// They are not when objects contain duplicate keys (encoding/json replaces slices, gopyjson appends to them),
+// escaped keys (gopyjson matches keys without unquoting them) or keys that differ from known keys
+// only in case (encoding/json matches keys case-insensitively).
+func fuzzComparable(data []byte, keys map[string]bool) bool {
+	d := json.NewDecoder(bytes.NewReader(data))
+	var objects []map[string]bool // Keys of objects we are inside of, nil for arrays
+	expectKey := false
+	for {
+		offset := d.InputOffset()
+		token, err := d.Token()
+		if err != nil {
+			return true
+		}
+		switch token {
+		case json.Delim('{'):
+			objects = append(objects, map[string]bool{})
+			expectKey = true
+			continue
+		case json.Delim('['):
+			objects = append(objects, nil)
+		case json.Delim('}'), json.Delim(']'):
+			objects = objects[:len(objects)-1]
+		default:
+			if key, ok := token.(string); ok && expectKey {
+				raw := data[offset:d.InputOffset()]
+				if bytes.IndexByte(raw[bytes.IndexByte(raw, '"'):], '\\') >= 0 {
+					return false
+				}
+				if objects[len(objects)-1][key] {
+					return false
+				}
+				objects[len(objects)-1][key] = true
+				if !keys[key] {
+					for k := range keys {
+						if strings.EqualFold(k, key) {
+							return false
+						}
+					}
+				}
+				expectKey = false
+				continue
+			}
+		}
+		// After a value, a key is expected if we are inside an object
+		expectKey = len(objects) > 0 && objects[len(objects)-1] != nil
+	}
+}
+
+// fuzzEqual compares values unmarshaled by gopyjson and encoding/json.
+// Nil and empty slices and maps are considered equal, struct fields tagged with `json:"-"` are skipped.
+func fuzzEqual(a, b reflect.Value) bool {
+	switch a.Kind() {
+	case reflect.Struct:
+		for i := 0; i < a.NumField(); i++ {
+			if a.Type().Field(i).Tag.Get("json") != "-" && !fuzzEqual(a.Field(i), b.Field(i)) {
+				return false
+			}
+		}
+		return true
+	case reflect.Array, reflect.Slice:
+		if a.Len() != b.Len() {
+			return false
+		}
+		for i := 0; i < a.Len(); i++ {
+			if !fuzzEqual(a.Index(i), b.Index(i)) {
+				return false
+			}
+		}
+		return true
+	case reflect.Map:
+		if a.Len() != b.Len() {
+			return false
+		}
+		for _, key := range a.MapKeys() {
+			if value := b.MapIndex(key); !value.IsValid() || !fuzzEqual(a.MapIndex(key), value) {
+				return false
+			}
+		}
+		return true
+	default:
+		return a.Interface() == b.Interface()
+	}
+}
+
+// fuzzSame compares values unmarshaled by two gopyjson methods, e.g. Unmarshal and UnmarshalIndexed.
+// Unlike reflect.DeepEqual, it considers NaN equal to NaN.
+func fuzzSame(a, b interface{}) bool {
+	return reflect.DeepEqual(a, b) || fmt.Sprintf("%#v", a) == fmt.Sprintf("%#v", b)
+}
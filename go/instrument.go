@@ -0,0 +1,142 @@
+//go:build gopyjson_instrument
+
+// This file is copied next to generated code when instrumentation is turned on, see README.md.
+// Instrumented parsers count calls, parsed bytes and nanoseconds of every parser function and struct field,
+// unknown keys skipped in every struct, and parse errors. Build with "-tags gopyjson_instrument" to use them.
+
+package gopyjson
+
+import (
+	"errors"
+	"expvar"
+	"reflect"
+	"strings"
+	"sync"
+	"sync/atomic"
+	_ "unsafe"
+)
+
+//go:linkname nanotime runtime.nanotime
+func nanotime() int64
+
+// instrumentCounter is updated atomically by instrumented parsers
+type instrumentCounter struct {
+	calls       int64
+	bytes       int64
+	nanoseconds int64
+}
+
+// add counts a call that parsed the given number of bytes and started at nanotime() start
+func (c *instrumentCounter) add(bytes int, start int64) {
+	atomic.AddInt64(&c.calls, 1)
+	atomic.AddInt64(&c.bytes, int64(bytes))
+	atomic.AddInt64(&c.nanoseconds, nanotime()-start)
+}
+
+// Counter is a snapshot of an instrumentation counter.
+// Time of nested parsers is included in time of parsers that called them.
+type Counter struct {
+	Calls       int64
+	Bytes       int64
+	Nanoseconds int64
+}
+
+// Instrumentation is a snapshot of all instrumentation counters
+type Instrumentation struct {
+	Counters map[string]Counter // Counters of parser functions, struct fields and skipped unknown keys by name
+	Errors   map[string]int64   // Number of parse errors by error message, without parts that depend on input
+}
+
+var instrumentation struct {
+	sync.Mutex
+	names    []string
+	counters []instrumentCounter
+	errors   map[string]*int64
+}
+
+// instrumentRegister registers counters of the generated parsers, called from generated code
+func instrumentRegister(names []string, counters []instrumentCounter) {
+	instrumentation.names = names
+	instrumentation.counters = counters
+}
+
+// Error messages that contain parts of input, the input is removed when counting errors
+var errPrefixes = []string{errUnexpectedKey, errStof64, errStof32}
+
+// instrumentError counts an error by its message
+func instrumentError(what string) {
+	for _, prefix := range errPrefixes {
+		if strings.HasPrefix(what, prefix) {
+			what = strings.TrimRight(prefix, ` ":`)
+		}
+	}
+	instrumentation.Lock()
+	count, ok := instrumentation.errors[what]
+	if !ok {
+		if instrumentation.errors == nil {
+			instrumentation.errors = map[string]*int64{}
+		}
+		count = new(int64)
+		instrumentation.errors[what] = count
+	}
+	instrumentation.Unlock()
+	atomic.AddInt64(count, 1)
+}
+
+// instrumentRecover is used by instrumented parsers instead of RecoverLater, it also counts the error
+func instrumentRecover(err *error) {
+	r := recover()
+	if r == nil {
+		*err = nil
+	} else if e, ok := r.(passthroughError); ok {
+		*err = e.err
+	} else {
+		if e, ok := r.(ParseError); ok {
+			instrumentError(e.what)
+		} else {
+			instrumentError("panic")
+		}
+		*err = errors.New(withStack(r))
+	}
+}
+
+// Snapshot returns current values of instrumentation counters
+func Snapshot() Instrumentation {
+	s := Instrumentation{Counters: map[string]Counter{}, Errors: map[string]int64{}}
+	for i, name := range instrumentation.names {
+		c := &instrumentation.counters[i]
+		s.Counters[name] = Counter{atomic.LoadInt64(&c.calls), atomic.LoadInt64(&c.bytes), atomic.LoadInt64(&c.nanoseconds)}
+	}
+	instrumentation.Lock()
+	for what, count := range instrumentation.errors {
+		s.Errors[what] = atomic.LoadInt64(count)
+	}
+	instrumentation.Unlock()
+	return s
+}
+
+// ResetInstrumentation sets all instrumentation counters to zero
+func ResetInstrumentation() {
+	for i := range instrumentation.counters {
+		c := &instrumentation.counters[i]
+		atomic.StoreInt64(&c.calls, 0)
+		atomic.StoreInt64(&c.bytes, 0)
+		atomic.StoreInt64(&c.nanoseconds, 0)
+	}
+	instrumentation.Lock()
+	instrumentation.errors = nil
+	instrumentation.Unlock()
+}
+
+// instrumentExpvar is the import path of the generated package, e.g. "example.com/project/gopyjson".
+// Every generated package is named gopyjson, so the import path tells apart packages linked into one binary.
+var instrumentExpvar = reflect.TypeOf(Counter{}).PkgPath()
+
+// The snapshot is also published as expvar named by the import path, e.g. served at /debug/vars by net/http
+func init() {
+	if expvar.Get(instrumentExpvar) == nil {
+		expvar.Publish(instrumentExpvar, expvar.Func(func() any {
+			return Snapshot()
+		}))
+	}
+}
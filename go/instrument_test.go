@@ -0,0 +1,51 @@
+//go:build gopyjson_instrument
+
+package gopyjson
+
+import (
+	"encoding/json"
+	"errors"
+	"expvar"
+	"testing"
+)
+
+func TestInstrumentation(t *testing.T) {
+	counters := make([]instrumentCounter, 2)
+	instrumentRegister([]string{"a", "b"}, counters)
+	counters[1].add(10, nanotime())
+	counters[1].add(5, nanotime())
+	parse := func(what string) (err error) {
+		defer instrumentRecover(&err)
+		panic(ParseError{nil, 0, what})
+	}
+	for _, what := range []string{errUnexpectedKey + `x"`, errUnexpectedKey + `y"`, errStof64 + "invalid syntax", errEofArray} {
+		if err := parse(what); err == nil {
+			t.Error("expected error")
+		}
+	}
+	stop := errors.New("stop")
+	err := func() (err error) {
+		defer instrumentRecover(&err)
+		panic(passthroughError{stop})
+	}()
+	if err != stop {
+		t.Error("expected passthrough error, got", err)
+	}
+	s := Snapshot()
+	if s.Counters["a"] != (Counter{}) || s.Counters["b"].Calls != 2 || s.Counters["b"].Bytes != 15 {
+		t.Error("wrong counters", s.Counters)
+	}
+	if len(s.Errors) != 3 || s.Errors["unexpected key"] != 2 || s.Errors["stof64"] != 1 || s.Errors[errEofArray] != 1 {
+		t.Error("wrong errors", s.Errors)
+	}
+	var published Instrumentation
+	if v := expvar.Get("pygojson"); v == nil {
+		t.Error("snapshot not published")
+	} else if err := json.Unmarshal([]byte(v.String()), &published); err != nil || published.Counters["b"].Calls != 2 {
+		t.Error("wrong published snapshot", v.String(), err)
+	}
+	ResetInstrumentation()
+	if s = Snapshot(); s.Counters["b"] != (Counter{}) || len(s.Errors) != 0 {
+		t.Error("counters not reset", s)
+	}
+}
@@ -1,6 +1,9 @@
 # This file contains parser generators for supported types.
 
+import json
+import random
 import shutil
+import string
 
 from go import *
 
@@ -26,7 +29,85 @@ def index(container_pointer: str, i: str):
         return f'(*{container_pointer})[{i}]'
 
 
+# Converts s to a Go string literal
+def go_string(s: str):
+    if '`' in s or '\r' in s:
+        return json.dumps(s, ensure_ascii=False)
+    return '`' + s + '`'
+
+
+# Returns a random number formatted with the given number of decimals, used by Parser.sample()
+def random_number(rng: random.Random, limit: float, decimals: int = 0):
+    return f'{rng.uniform(-limit, limit):.{decimals}f}'
+
+
+# Joins samples into a JSON array, the number of allocations is None if it is None for any of the samples
+def sample_sequence(samples: list[tuple[str, int | None]]) -> tuple[str, int | None]:
+    allocs = [a for _, a in samples]
+    return '[' + ','.join(data for data, _ in samples) + ']', None if None in allocs else sum(allocs)
+
+
+# Generates the deferred call that recovers from parse errors and returns them
+def recover_later():
+    if Package.current.instrumenting:
+        wl('defer instrumentRecover(&err)')
+    else:
+        wl('defer RecoverLater(&err)')
+
+
+# Returns the name of the generated parser function with a given index.
+# Indexed parsers (see Parser.generate_indexed()) are named differently, so both can be generated into the same file.
+def parser_name(f: int) -> str:
+    return f'iTrim{f}' if Package.current.indexing else f'pTrim{f}'
+
+
+# Returns the signature of the generated parser function with index f, which parses the type with index t.
+# Indexed parsers also take the structural index I.
+def parser_signature(f: int, t: int) -> str:
+    if Package.current.indexing:
+        return f'iTrim{f}(b *[]byte, N *int, I *Index, v *type{t})'
+    return f'pTrim{f}(b *[]byte, N *int, v *type{t})'
+
+
+# Returns the name of a function from common.go that skips over whitespace, strings or values.
+# Indexed parsers call the method of the structural index I with the same name instead, which uses the index to skip.
+def common(name: str) -> str:
+    assert name in ('trimLeftSpace', 'pTrimStringBytes', 'pTrimKeyColon', 'pTrimValue')
+    return 'I.' + name if Package.current.indexing else name
+
+
+# Generates the call of the resumable parser of an object or array nested in the object or array at depth k,
+# see Parser.generate_resumable()
+def trim_frame(parser: 'Parser', pvar: str):
+    new, t = Package.RegisterType(parser)
+    assert not new
+    new, f = Package.RegisterParser(parser)
+    assert not new
+    with If(f'!rTrim{f}(d, k+1, (*type{t})({pvar}))'):
+        wl('return false')
+
+
+# Counts calls, parsed bytes and time of the parsing code generated inside the "with" block,
+# if instrumented code is being generated. Counters are identified by name.
+@contextmanager
+def Instrumented(name: str):
+    if not Package.current.instrumenting:
+        yield
+        return
+    counters = Package.current.counters
+    if name not in counters:
+        counters[name] = len(counters)
+    wl('{')
+    with Indent():
+        wl('t0, n0 := nanotime(), *N')
+        yield
+        wl(f'instrumentCounters[{counters[name]}].add(*N-n0, t0)')
+    wl('}')
+
+
 class Parser:
+    numpy_dtype: str = ''  # NumPy dtype of scalar types, which is also the name of the Go type
+
     def __init__(self, typename: str = ''):
         self.typename = typename  # The Go typename for this type, can be empty
 
@@ -58,15 +139,20 @@ class Parser:
         # Check if the parser was defined first
         new, f = Package.RegisterParser(self)
         assert not new
-        wl(f'pTrim{f}(b, N, (*type{t})({pvar}))')
+        with Instrumented(f'{self.typename or type(self).__name__} ({parser_name(f)})'):
+            if Package.current.indexing:
+                wl(f'iTrim{f}(b, N, I, (*type{t})({pvar}))')
+            else:
+                wl(f'pTrim{f}(b, N, (*type{t})({pvar}))')
 
     # Generates code that parses this type from b starting at index N using a given function, saves result to pvar.
     # This is used by simple types like integers or floats in combination with predefined parsers from common.go.
     def trim_using(self, pvar, func: str):
-        if self.typename:
-            wl(f'{dereference(pvar)} = {self.typename}({func}(b, N))')
-        else:
-            wl(f'{dereference(pvar)} = {func}(b, N)')
+        with Instrumented(func):
+            if self.typename:
+                wl(f'{dereference(pvar)} = {self.typename}({func}(b, N))')
+            else:
+                wl(f'{dereference(pvar)} = {func}(b, N)')
 
     # Generates either the typename or type definition, used for variable declarations
     def print_type(self):
@@ -95,24 +181,541 @@ class Parser:
     def generate_parser(self):
         pass
 
-    # Generates the Unmarshal method for this type
-    def generate(self, func_name: str = 'Unmarshal'):
+    # Returns scalar values contained in this type as a list of (name, Go expression, NumPy dtype).
+    # Argument var is a Go expression that evaluates to a value of this type.
+    # Used by Python bindings, which return every scalar value as a NumPy array. Variable length types are skipped.
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        if self.numpy_dtype:
+            return [(name, var, self.numpy_dtype)]
+        return []
+
+    # Returns JSON text of a random value of this type and the number of allocations made when parsing it,
+    # or None if that number is not predictable. Argument reused tells whether the parsed value is reused between parses,
+    # which is not the case for elements of slices. Used by generated tests and benchmarks.
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        raise NotImplementedError()
+
+    # Whether encoding/json parses the same JSON into an equal value of mirror_type(), used by generated fuzz targets
+    def mirrorable(self) -> bool:
+        return False
+
+    # Generates a type that encoding/json can parse into, with the same memory layout as this type.
+    # Keys of JSON objects contained in this type are added to keys.
+    def mirror_type(self, keys: set[str]):
+        self.print_type()
+
+    # Generates code that validates this type in b starting at index N, without storing anything
+    def validate(self):
+        new, f = Package.RegisterValidator(self)
+        assert not new
+        wl(f'vTrim{f}(b, N)')
+
+    # Generates code that validates this type using a given parser function from common.go, discarding the result
+    def validate_using(self, func: str):
+        wl(f'{func}(b, N)')
+
+    # Generates the validator if an equivalent validator has not already been generated.
+    # Validators follow the same structure as parsers, but they never store values or allocate.
+    def generate_validator(self):
+        pass
+
+    # Generates code that parses this type into pvar inside the resumable parser of an object or array at depth k.
+    # Values other than objects and arrays are parsed by their regular parser once all of the value was fed.
+    def trim_resumable(self, pvar: str):
+        wls('''
+        b, N, ok := d.leaf()
+        if !ok {
+            return false
+        }
+        ''')
+        self.trim(pvar)
+        wl('d.parsed()')
+
+    # Generates the resumable parsers of this type and the types it contains, only objects and arrays have them
+    def generate_resumable_parser(self):
+        pass
+
+    # Whether parsed values may reference the parsed input instead of copying it.
+    # Resumable parsers don't support such types, chunks of the input may be reused once they are parsed.
+    def references_input(self) -> bool:
+        return False
+
+    # Generates the Unmarshal method for this type.
+    # If validate_only is True, generates only Validate<typename>(data []byte) error instead, see generate_validate()
+    def generate(self, func_name: str = 'Unmarshal', validate_only: bool = False):
         assert self.typename
-        if f'{self.typename}.{func_name}' in Package.current.unmarshalers:
-            raise Exception(f'{self.typename}.{func_name} already defined')
+        if validate_only:
+            self.generate_validate()
+            return
+        for _ in Package.current.variants():
+            if f'{self.typename}.{func_name}' in Package.current.unmarshalers:
+                raise Exception(f'{self.typename}.{func_name} already defined')
+
+            Package.current.unmarshalers.add(f'{self.typename}.{func_name}')
+            if Package.current.python_bindings and not Package.current.instrumenting:
+                Package.current.bindings.append((self.typename, func_name, self.leaves('', 'v')))
+            self.generate_type()
+            self.generate_parser()
+            with Func(f'(v *{self.typename}) {func_name}(data []byte) (err error)'):
+                self.zero('v')
+                recover_later()
+                wl('var n int')
+                wl('N := &n')
+                wl('b := &data')
+                wl('trimLeftSpace(b, N)')
+                self.trim('v')
+                wl('return nil')
+        if Package.current.tests:
+            with Into(Package.current.test_file):
+                self.generate_tests(func_name)
+
+    # Generates function Validate<typename>(data []byte) error, which checks that data can be unmarshaled into this type:
+    # types of values, ranges of numbers, validity of strings, array lengths and keys (if other_keys == 'fail').
+    # Values are not stored, so strings are not copied and nothing is allocated.
+    def generate_validate(self):
+        name = 'Validate' + self.typename
+        for _ in Package.current.variants():
+            if name in Package.current.unmarshalers:
+                raise Exception(f'{name} already defined')
+            Package.current.unmarshalers.add(name)
+            self.generate_validator()
+            with Func(f'{name}(data []byte) (err error)'):
+                recover_later()
+                wl('var n int')
+                wl('N := &n')
+                wl('b := &data')
+                wl('trimLeftSpace(b, N)')
+                self.validate()
+                wl('return nil')
+        if Package.current.tests:
+            with Into(Package.current.test_file):
+                self.generate_validate_tests(name)
+
+    # Generates tests for Validate<typename> using random samples of this type:
+    # - Test<name> checks that samples are valid and validated without allocations
+    # - Benchmark<name> measures validation of samples
+    # - Fuzz<name> checks that validation agrees with Unmarshal, if Unmarshal was generated first
+    def generate_validate_tests(self, name: str, samples: int = 16):
+        Import('testing')
+        rng = random.Random(name)
+        wl()
+        wl(f'// Samples of {self.typename}')
+        wl(f'var samples{name} = [][]byte{{')
+        with Indent():
+            for _ in range(samples):
+                wl(f'[]byte({go_string(self.sample(rng, True)[0])}),')
+        wl('}')
+        wl()
+        wls('''
+        func Test{name}(t *testing.T) {
+            for _, data := range samples{name} {
+                if err := {name}(data); err != nil {
+                    t.Fatalf("%s: %v", data, err)
+                }
+                if allocs := testing.AllocsPerRun(10, func() { _ = {name}(data) }); allocs > 0 {
+                    t.Errorf("%s: %v allocations, expected 0", data, allocs)
+                }
+            }
+        }
 
-        Package.current.unmarshalers.add(f'{self.typename}.{func_name}')
-        self.generate_type()
-        self.generate_parser()
-        with Func(f'(v *{self.typename}) {func_name}(data []byte) (err error)'):
-            self.zero('v')
-            wl('defer RecoverLater(&err)')
-            wl('var n int')
-            wl('N := &n')
-            wl('b := &data')
-            wl('trimLeftSpace(b, N)')
-            self.trim('v')
-            wl('return nil')
+        func Benchmark{name}(b *testing.B) {
+            var size int
+            for _, data := range samples{name} {
+                size += len(data)
+            }
+            b.SetBytes(int64(size / len(samples{name})))
+            b.ReportAllocs()
+            b.ResetTimer()
+            for i := 0; i < b.N; i++ {
+                if err := {name}(samples{name}[i%len(samples{name})]); err != nil {
+                    b.Fatal(err)
+                }
+            }
+        }
+        ''', name=name)
+        if f'{self.typename}.Unmarshal' in Package.current.unmarshalers:
+            wl()
+            wls('''
+            func Fuzz{name}(f *testing.F) {
+                for _, data := range samples{name} {
+                    f.Add(data)
+                }
+                f.Fuzz(func(t *testing.T, data []byte) {
+                    var v {typename}
+                    unmarshalErr := v.Unmarshal(data)
+                    validateErr := {name}(data)
+                    if (unmarshalErr == nil) != (validateErr == nil) {
+                        t.Errorf("%s: Unmarshal returned %v, {name} returned %v", data, unmarshalErr, validateErr)
+                    }
+                })
+            }
+            ''', name=name, typename=self.typename)
+
+    # Generates method <func_name>(I *Index) error, which parses the next JSON value of the input indexed by I into v.
+    # Indexed parsers jump over whitespace, strings and skipped values using the structural index, see Index in common.go.
+    # Returns io.EOF once there are no more values. After an error, parsing continues at the line following the start
+    # of the malformed value, so a whole NDJSON block can be indexed at once and then parsed line by line.
+    def generate_indexed(self, func_name: str = 'UnmarshalIndexed'):
+        assert self.typename
+        for _ in Package.current.variants():
+            if f'{self.typename}.{func_name}' in Package.current.unmarshalers:
+                raise Exception(f'{self.typename}.{func_name} already defined')
+            Package.current.unmarshalers.add(f'{self.typename}.{func_name}')
+            self.generate_type()
+            with Package.current.Indexing():
+                self.generate_parser()
+                Import('io')
+                with Func(f'(v *{self.typename}) {func_name}(I *Index) (err error)'):
+                    wl('b, N, ok := I.nextValue()')
+                    with If('!ok'):
+                        wl('return io.EOF')
+                    self.zero('v')
+                    wl('defer I.skipLineOnError(&err)')
+                    recover_later()
+                    self.trim('v')
+                    wl('return nil')
+        if Package.current.tests:
+            with Into(Package.current.test_file):
+                self.generate_indexed_tests(func_name)
+
+    # Generates tests for the indexed unmarshaler using random samples of this type:
+    # - Test<name> parses an NDJSON block of samples, and a block of indented samples, checking that they are
+    #   parsed without errors, into the same values as by Unmarshal if Unmarshal was generated first
+    # - Benchmark<name> measures indexing and parsing of the block of indented samples
+    # - Fuzz<name> checks that the indexed unmarshaler agrees with Unmarshal, if Unmarshal was generated first
+    def generate_indexed_tests(self, func_name: str, samples: int = 16):
+        Import('bytes')
+        Import('encoding/json')
+        Import('io')
+        Import('testing')
+        name = self.typename + func_name
+        unmarshal = f'{self.typename}.Unmarshal' in Package.current.unmarshalers
+        rng = random.Random(name)
+        wl()
+        wl(f'// Samples of {self.typename}')
+        wl(f'var samples{name} = [][]byte{{')
+        with Indent():
+            for _ in range(samples):
+                wl(f'[]byte({go_string(self.sample(rng, True)[0])}),')
+        wl('}')
+        wl()
+        wls('''
+        // indented{name} returns samples{name} indented by the given string, or as they are if it's empty
+        func indented{name}(t testing.TB, indent string) [][]byte {
+            if indent == "" {
+                return samples{name}
+            }
+            var result [][]byte
+            for _, data := range samples{name} {
+                var buffer bytes.Buffer
+                if err := json.Indent(&buffer, data, "", indent); err != nil {
+                    t.Fatalf("%s: %v", data, err)
+                }
+                result = append(result, buffer.Bytes())
+            }
+            return result
+        }
+
+        func Test{name}(t *testing.T) {
+            for _, indent := range []string{"", "    "} {
+                samples := indented{name}(t, indent)
+                var index Index
+                index.Build(bytes.Join(samples, []byte("\\n")))
+                for _, data := range samples {
+                    var v {typename}
+                    if err := v.{func_name}(&index); err != nil {
+                        t.Fatalf("%s: %v", data, err)
+                    }
+        ''', name=name, typename=self.typename, func_name=func_name)
+        if unmarshal:
+            with Indent(3):
+                wls('''
+                var expected {typename}
+                if err := expected.Unmarshal(data); err != nil {
+                    t.Fatalf("%s: %v", data, err)
+                }
+                if !reflect.DeepEqual(v, expected) {
+                    t.Errorf("%s: parsed %+v, Unmarshal parsed %+v", data, v, expected)
+                }
+                ''', typename=self.typename)
+        wls('''
+                }
+                var v {typename}
+                if err := v.{func_name}(&index); err != io.EOF {
+                    t.Errorf("expected io.EOF after the last sample, got %v", err)
+                }
+            }
+        }
+
+        func Benchmark{name}(b *testing.B) {
+            block := bytes.Join(indented{name}(b, "    "), []byte("\\n"))
+            var v {typename}
+            var index Index
+            b.SetBytes(int64(len(block)))
+            b.ReportAllocs()
+            b.ResetTimer()
+            for i := 0; i < b.N; i++ {
+                index.Build(block)
+                for {
+                    err := v.{func_name}(&index)
+                    if err == io.EOF {
+                        break
+                    }
+                    if err != nil {
+                        b.Fatal(err)
+                    }
+                }
+            }
+        }
+        ''', name=name, typename=self.typename, func_name=func_name)
+        if not unmarshal:
+            return
+        Import('reflect')
+        wl()
+        wls('''
+        func Fuzz{name}(f *testing.F) {
+            for _, data := range samples{name} {
+                f.Add(data)
+            }
+            f.Fuzz(func(t *testing.T, data []byte) {
+                var v, expected {typename}
+                var index Index
+                index.Build(data)
+                err := v.{func_name}(&index)
+                expectedErr := expected.Unmarshal(data)
+                if (err == nil) != (expectedErr == nil) {
+                    t.Errorf("%s: {func_name} returned %v, Unmarshal returned %v", data, err, expectedErr)
+                } else if err == nil && !fuzzSame(v, expected) {
+                    t.Errorf("%s: parsed %+v, Unmarshal parsed %+v", data, v, expected)
+                }
+            })
+        }
+        ''', name=name, typename=self.typename, func_name=func_name)
+
+    # Generates resumable parsers of this object or array type. Decoder (see common.go) uses them to parse a value
+    # that spans multiple chunks as the chunks arrive, instead of buffering all of the value and parsing it at the end.
+    # Requires the Unmarshal method, see generate(). Types that reference the parsed input are not supported.
+    def generate_resumable(self):
+        assert self.typename
+        if not isinstance(self, (Struct, Slice)):
+            raise Exception(f'{self.typename} is not an object or array, only those can be parsed resumably')
+        if self.references_input():
+            raise Exception(f"{self.typename} references the parsed input, so it can't be parsed resumably")
+        for _ in Package.current.variants():
+            if f'{self.typename}.Unmarshal' not in Package.current.unmarshalers:
+                raise Exception(f'{self.typename}.Unmarshal must be generated first')
+            if f'{self.typename}.unmarshalResumable' in Package.current.unmarshalers:
+                raise Exception(f'{self.typename}.unmarshalResumable already defined')
+            Package.current.unmarshalers.add(f'{self.typename}.unmarshalResumable')
+            self.generate_resumable_parser()
+            new, t = Package.RegisterType(self)
+            new, f = Package.RegisterParser(self)
+            with Func(f'(v *{self.typename}) unmarshalResumable(d *Decoder) (done bool, err error)'):
+                with If('len(d.frames) == 0'):
+                    self.zero('v')
+                recover_later()
+                wl(f'return rTrim{f}(d, 0, (*type{t})(v)), nil')
+        if Package.current.tests:
+            with Into(Package.current.test_file):
+                self.generate_resumable_tests()
+
+    # Generates tests for resumable parsing using random samples of this type:
+    # - Test<typename>Resumable decodes a stream of samples fed in chunks of various sizes,
+    #   checking that they are decoded into the same values as by Unmarshal
+    # - Fuzz<typename>Resumable checks that input fed in chunks is decoded like input fed at once
+    def generate_resumable_tests(self, samples: int = 16):
+        Import('bytes')
+        Import('io')
+        Import('reflect')
+        Import('testing')
+        name = self.typename + 'Resumable'
+        rng = random.Random(name)
+        wl()
+        wl(f'// Samples of {self.typename}')
+        wl(f'var samples{name} = [][]byte{{')
+        with Indent():
+            for _ in range(samples):
+                wl(f'[]byte({go_string(self.sample(rng, True)[0])}),')
+        wl('}')
+        wl()
+        wls('''
+        // decode{name} feeds data to a Decoder in chunks of the given size,
+        // returns the values and errors returned by Decode, and at the end by Flush
+        func decode{name}(data []byte, size int) (values []{typename}, errs []error) {
+            var d Decoder
+            v := new({typename})
+            for n := 0; n < len(data); n += size {
+                end := n + size
+                if end > len(data) {
+                    end = len(data)
+                }
+                d.Feed(data[n:end])
+                for {
+                    err := d.Decode(v)
+                    if err == ErrNeedMore {
+                        break
+                    }
+                    values, errs = append(values, *v), append(errs, err)
+                    v = new({typename})
+                }
+            }
+            for {
+                err := d.Flush(v)
+                values, errs = append(values, *v), append(errs, err)
+                if err == io.EOF || err == io.ErrUnexpectedEOF {
+                    return
+                }
+                v = new({typename})
+            }
+        }
+
+        func Test{name}(t *testing.T) {
+            data := bytes.Join(samples{name}, []byte("\\n"))
+            for size := 1; size <= len(data); size = size*2 + 1 {
+                values, errs := decode{name}(data, size)
+                if len(errs) != len(samples{name})+1 || errs[len(errs)-1] != io.EOF {
+                    t.Fatalf("chunks of %d bytes: decoded %d values, ended with %v", size, len(errs)-1, errs[len(errs)-1])
+                }
+                for i, sample := range samples{name} {
+                    var expected {typename}
+                    if err := expected.Unmarshal(sample); err != nil {
+                        t.Fatalf("%s: %v", sample, err)
+                    }
+                    if errs[i] != nil || !reflect.DeepEqual(values[i], expected) {
+                        t.Errorf("chunks of %d bytes: %s: decoded %+v, %v, Unmarshal parsed %+v", size, sample, values[i], errs[i], expected)
+                    }
+                }
+            }
+        }
+
+        func Fuzz{name}(f *testing.F) {
+            for _, data := range samples{name} {
+                f.Add(data, uint8(3))
+            }
+            f.Fuzz(func(t *testing.T, data []byte, size uint8) {
+                expectedValues, expectedErrs := decode{name}(data, len(data)+1)
+                values, errs := decode{name}(data, int(size)+1)
+                if len(errs) != len(expectedErrs) {
+                    t.Fatalf("%q in chunks of %d bytes: %d results, %d when fed at once", data, size+1, len(errs), len(expectedErrs))
+                }
+                for i, err := range errs {
+                    expectedErr := expectedErrs[i]
+                    if (err == nil) != (expectedErr == nil) || (err == io.EOF) != (expectedErr == io.EOF) ||
+                        err == nil && !fuzzSame(values[i], expectedValues[i]) {
+                        t.Errorf("%q in chunks of %d bytes: decoded %+v, %v, when fed at once %+v, %v",
+                            data, size+1, values[i], err, expectedValues[i], expectedErr)
+                    }
+                }
+            })
+        }
+        ''', name=name, typename=self.typename)
+
+    # Generates tests for the Unmarshal method using random samples of this type:
+    # - Test<typename><func_name> checks that samples are parsed without more allocations than expected
+    # - Benchmark<typename><func_name> measures parsing of samples
+    # - Fuzz<typename><func_name> checks that parsing doesn't panic, and if both gopyjson and encoding/json
+    #   parse the input, that they parse it into equal values (if encoding/json supports this type)
+    def generate_tests(self, func_name: str, samples: int = 16):
+        Import('testing')
+        name = self.typename + func_name
+        rng = random.Random(name)
+        wl()
+        wl(f'// Samples of {self.typename} and the number of allocations made by {func_name} when the parsed value is reused,')
+        wl('// or -1 if that number is not predictable')
+        wl(f'var samples{name} = []struct ')
+        with Braces():
+            wl('data   []byte')
+            wl('allocs float64')
+        w('{')
+        with Indent():
+            for _ in range(samples):
+                data, allocs = self.sample(rng, True)
+                wl(f'{{[]byte({go_string(data)}), {-1 if allocs is None else allocs}}},')
+        wl('}')
+        wl()
+        wls('''
+        func Test{name}(t *testing.T) {
+            var v {typename}
+            for _, sample := range samples{name} {
+                if err := v.{func_name}(sample.data); err != nil {
+                    t.Fatalf("%s: %v", sample.data, err)
+                }
+                if sample.allocs < 0 {
+                    continue
+                }
+                allocs := testing.AllocsPerRun(10, func() {
+                    _ = v.{func_name}(sample.data)
+                })
+                if allocs > sample.allocs {
+                    t.Errorf("%s: %v allocations, expected %v", sample.data, allocs, sample.allocs)
+                }
+            }
+        }
+
+        func Benchmark{name}(b *testing.B) {
+            var v {typename}
+            var size int
+            for _, sample := range samples{name} {
+                size += len(sample.data)
+            }
+            b.SetBytes(int64(size / len(samples{name})))
+            b.ReportAllocs()
+            b.ResetTimer()
+            for i := 0; i < b.N; i++ {
+                if err := v.{func_name}(samples{name}[i%len(samples{name})].data); err != nil {
+                    b.Fatal(err)
+                }
+            }
+        }
+        ''', name=name, typename=self.typename, func_name=func_name)
+        if not self.mirrorable():
+            wl()
+            wls('''
+            func Fuzz{name}(f *testing.F) {
+                for _, sample := range samples{name} {
+                    f.Add(sample.data)
+                }
+                f.Fuzz(func(t *testing.T, data []byte) {
+                    var v {typename}
+                    _ = v.{func_name}(data)
+                })
+            }
+            ''', name=name, typename=self.typename, func_name=func_name)
+            return
+        Import('encoding/json')
+        Import('reflect')
+        Import('unsafe')
+        keys = set()
+        wl()
+        wl(f'// The type encoding/json parses {self.typename} into, used to compare results')
+        wl(f'type mirror{name} = ')
+        self.mirror_type(keys)
+        wl()
+        wl(f'// Keys of JSON objects in {self.typename}')
+        wl(f'var fuzzKeys{name} = map[string]bool{{')
+        w(', '.join(f'{go_string(k)}: true' for k in sorted(keys)))
+        w('}')
+        wl()
+        wls('''
+        func Fuzz{name}(f *testing.F) {
+            for _, sample := range samples{name} {
+                f.Add(sample.data)
+            }
+            f.Fuzz(func(t *testing.T, data []byte) {
+                var v {typename}
+                if v.{func_name}(data) != nil || !fuzzComparable(data, fuzzKeys{name}) {
+                    return
+                }
+                var expected mirror{name}
+                if json.Unmarshal(data, &expected) != nil {
+                    return
+                }
+                if !fuzzEqual(reflect.ValueOf((*mirror{name})(unsafe.Pointer(&v))).Elem(), reflect.ValueOf(expected)) {
+                    t.Errorf("%s: parsed %+v, encoding/json parsed %+v", data, v, expected)
+                }
+            })
+        }
+        ''', name=name, typename=self.typename, func_name=func_name)
 
     # Syntactic sugar for (self, json_field), used with Struct() fields that don't have the same name as json field
     def __floordiv__(self, json_field: str) -> tuple['Parser', str]:
@@ -121,9 +724,20 @@ class Parser:
 
 # Used for parsing a boolean
 class Bool(Parser):
+    numpy_dtype = 'bool'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimBool')
 
+    def validate(self):
+        self.validate_using('pTrimBool')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return rng.choice(('true', 'false')), 0
+
+    def mirrorable(self) -> bool:
+        return True
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = false')
 
@@ -133,9 +747,20 @@ class Bool(Parser):
 
 # Used for parsing an int64
 class Int64(Parser):
+    numpy_dtype = 'int64'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimInt64')
 
+    def validate(self):
+        self.validate_using('pTrimInt64')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return random_number(rng, 1e12), 0
+
+    def mirrorable(self) -> bool:
+        return True
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = 0')
 
@@ -145,9 +770,20 @@ class Int64(Parser):
 
 # Used for parsing an uint64
 class UInt64(Parser):
+    numpy_dtype = 'uint64'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimUint64')
 
+    def validate(self):
+        self.validate_using('pTrimUint64')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return str(rng.randint(0, 10 ** 12)), 0
+
+    def mirrorable(self) -> bool:
+        return True
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = 0')
 
@@ -157,9 +793,20 @@ class UInt64(Parser):
 
 # Used for parsing a float32
 class Float32(Parser):
+    numpy_dtype = 'float32'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimFloat32')
 
+    def validate(self):
+        self.validate_using('pTrimFloat32')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return random_number(rng, 1e3, 3), 0
+
+    def mirrorable(self) -> bool:
+        return True
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = 0')
 
@@ -169,9 +816,20 @@ class Float32(Parser):
 
 # Used for parsing a float64
 class Float64(Parser):
+    numpy_dtype = 'float64'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimFloat64')
 
+    def validate(self):
+        self.validate_using('pTrimFloat64')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return random_number(rng, 1e6, 6), 0
+
+    def mirrorable(self) -> bool:
+        return True
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = 0')
 
@@ -202,8 +860,8 @@ class String(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
-                wl('s := pTrimStringBytes(b, N)')
+            with Func(parser_signature(f, t)):
+                wl(f's := {common("pTrimStringBytes")}(b, N)')
                 if self.validate_utf8:  # Validating before unquoting
                     Import('unicode/utf8')
                     with If(f'!utf8.Valid(s)'):
@@ -217,12 +875,41 @@ class String(Parser):
                 else:
                     wl(f'*v = type{t}(bytesToString(s))')
 
+    # Strings are checked as when parsing, but without unquoting them
+    def generate_validator(self):
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
+                if not self.validate_utf8:
+                    wl('pTrimStringBytes(b, N)')
+                    return
+                wl('s := pTrimStringBytes(b, N)')
+                Import('unicode/utf8')
+                with If(f'!utf8.Valid(s)'):
+                    wl('panic(ParseError{*b, *N, errUTF8})')
+                if self.unquote:
+                    with If('!validQuoted((*b)[*N - len(s) - 2:*N])'):
+                        wl('panic(ParseError{*b, *N, errUnquote})')
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = ""')
 
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        s = ''.join(rng.choices(string.ascii_letters + string.digits, k=rng.randint(0, 12)))
+        # Go doesn't allocate one byte strings
+        return f'"{s}"', 1 if self.copy and len(s) > 1 else 0
+
+    # Escaped strings are parsed differently unless they are unquoted,
+    # and encoding/json replaces invalid UTF-8 instead of failing
+    def mirrorable(self) -> bool:
+        return self.unquote and self.validate_utf8
+
     def long_typename(self):
         w('string')
 
+    def references_input(self) -> bool:
+        return not self.copy
+
 
 # Turns off all safety features and avoids copying. Parsing is faster as a result.
 class UnsafeString(String):
@@ -250,6 +937,22 @@ class Array(Parser):
     def type_id(self):
         return Array, self.size, self.element_parser.type_id(), self.element_parser.typename
 
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        return [leaf for i in range(self.size) for leaf in self.element_parser.leaves(f'{name}[{i}]', f'{var}[{i}]')]
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return sample_sequence([self.element_parser.sample(rng, reused) for _ in range(self.size)])
+
+    def mirrorable(self) -> bool:
+        return self.element_parser.mirrorable()
+
+    def mirror_type(self, keys: set[str]):
+        w(f'[{self.size}]')
+        self.element_parser.mirror_type(keys)
+
+    def references_input(self) -> bool:
+        return self.element_parser.references_input()
+
     def parser_id(self):
         return self.size, self.element_parser.parser_id()
 
@@ -263,14 +966,29 @@ class Array(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
+            with Func(parser_signature(f, t)):
+                wl("pTrimByte(b, N, '[')")
+                wl(f'{common("trimLeftSpace")}(b, N)')
+                for i in range(self.size):
+                    if i > 0:
+                        wl("pTrimByte(b, N, ',')")
+                        wl(f'{common("trimLeftSpace")}(b, N)')
+                    self.element_parser.trim('&' + index('v', str(i)))
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+                wl("pTrimByte(b, N, ']')")
+
+    def generate_validator(self):
+        self.element_parser.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
                 wl("pTrimByte(b, N, '[')")
                 wl('trimLeftSpace(b, N)')
                 for i in range(self.size):
                     if i > 0:
                         wl("pTrimByte(b, N, ',')")
                         wl('trimLeftSpace(b, N)')
-                    self.element_parser.trim('&' + index('v', str(i)))
+                    self.element_parser.validate()
                     wl('trimLeftSpace(b, N)')
                 wl("pTrimByte(b, N, ']')")
 
@@ -310,14 +1028,30 @@ class Tuple(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
+            with Func(parser_signature(f, t)):
                 wl("pTrimByte(b, N, '[')")
-                wl('trimLeftSpace(b, N)')
+                wl(f'{common("trimLeftSpace")}(b, N)')
                 for i, (key, t) in enumerate(self.fields.items()):
                     if i > 0:
                         wl("pTrimByte(b, N, ',')")
-                        wl('trimLeftSpace(b, N)')
+                        wl(f'{common("trimLeftSpace")}(b, N)')
                     t.trim(field_pointer('v', key))
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+                wl("pTrimByte(b, N, ']')")
+
+    def generate_validator(self):
+        for t in self.fields.values():
+            t.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
+                wl("pTrimByte(b, N, '[')")
+                wl('trimLeftSpace(b, N)')
+                for i, t in enumerate(self.fields.values()):
+                    if i > 0:
+                        wl("pTrimByte(b, N, ',')")
+                        wl('trimLeftSpace(b, N)')
+                    t.validate()
                     wl('trimLeftSpace(b, N)')
                 wl("pTrimByte(b, N, ']')")
 
@@ -325,6 +1059,15 @@ class Tuple(Parser):
         for k, t in self.fields.items():
             t.zero(field_pointer(pvar, k))
 
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        return [leaf for k, t in self.fields.items() for leaf in t.leaves(f'{name}.{k}' if name else k, f'{var}.{k}')]
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return sample_sequence([t.sample(rng, reused) for t in self.fields.values()])
+
+    def references_input(self) -> bool:
+        return any(t.references_input() for t in self.fields.values())
+
 
 # Used for parsing arrays of variable length and known element types into a Go slice
 class Slice(Parser):
@@ -343,6 +1086,18 @@ class Slice(Parser):
         # This way there are fewer allocations if the object is reused.
         wl(f'{dereference(pvar)} = {index(pvar, ":0")}')
 
+    # Appending allocates only if the slice is not reused and already grown
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        data, allocs = sample_sequence([self.element_parser.sample(rng, False) for _ in range(rng.randint(0, 3))])
+        return data, allocs if reused or data == '[]' else None
+
+    def mirrorable(self) -> bool:
+        return self.element_parser.mirrorable()
+
+    def mirror_type(self, keys: set[str]):
+        w('[]')
+        self.element_parser.mirror_type(keys)
+
     def long_typename(self):
         w(f'[]')
         self.element_parser.print_type()
@@ -357,29 +1112,245 @@ class Slice(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
-                wl(f'var element ')
-                self.element_parser.print_type()
+            with Func(parser_signature(f, t)):
+                wl("pTrimByte(b, N, '[')")
+                wl(f'{common("trimLeftSpace")}(b, N)')
+                with If('*N >= len(*b)'):
+                    wl('panic(ParseError{*b, *N, errEofArray})')
+                with If("(*b)[*N] == ']'"):
+                    wl('*N++')
+                    wl('return')
+                with For():
+                    # Every element starts from zero, elements must not share memory or keep values of previous ones
+                    wl(f'var element ')
+                    self.element_parser.print_type()
+                    self.element_parser.trim('&element')
+                    wl(f'*v = append(*v, element)')
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+                    with If('*N >= len(*b)'):
+                        wl('panic(ParseError{*b, *N, errEofArray})')
+                    with If("(*b)[*N] == ']'"):
+                        wl('*N++')
+                        wl('return')
+                    wl("pTrimByte(b, N, ',')")
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+
+    def generate_validator(self):
+        self.element_parser.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
                 wl("pTrimByte(b, N, '[')")
                 wl('trimLeftSpace(b, N)')
                 with If('*N >= len(*b)'):
-                    wl('panic(ParseError{*b, *N, "unexpected end of array"})')
+                    wl('panic(ParseError{*b, *N, errEofArray})')
                 with If("(*b)[*N] == ']'"):
                     wl('*N++')
                     wl('return')
-                self.element_parser.trim('&element')
-                wl(f'*v = append(*v, element)')
                 with For():
+                    self.element_parser.validate()
                     wl('trimLeftSpace(b, N)')
                     with If('*N >= len(*b)'):
-                        wl('panic(ParseError{*b, *N, "unexpected end of array"})')
+                        wl('panic(ParseError{*b, *N, errEofArray})')
+                    with If("(*b)[*N] == ']'"):
+                        wl('*N++')
+                        wl('return')
+                    wl("pTrimByte(b, N, ',')")
+                    wl('trimLeftSpace(b, N)')
+
+    def trim_resumable(self, pvar: str):
+        trim_frame(self, pvar)
+
+    def generate_resumable_parser(self):
+        self.element_parser.generate_resumable_parser()
+        new, t = Package.RegisterType(self)
+        assert not new
+        new, f = Package.RegisterParser(self)
+        assert not new
+        if f in Package.current.resumables:
+            return
+        Package.current.resumables.add(f)
+        with Func(f'rTrim{f}(d *Decoder, k int, v *type{t}) bool'):
+            wl('d.enter(k)')
+            with For():
+                with If('d.frames[k].state != frameValue'):
+                    wls('''
+                    done, ok := d.element(k)
+                    if !ok || done {
+                        return done
+                    }
+                    ''')
+                    # Every element starts from zero, like when parsing with the regular parser
+                    wl('var element ')
+                    self.element_parser.print_type()
+                    wl('*v = append(*v, element)')
+                self.element_parser.trim_resumable('&(*v)[len(*v)-1]')
+                wl('d.frames[k].state = frameAfter')
+
+    def references_input(self) -> bool:
+        return self.element_parser.references_input()
+
+    # Generates methods that parse the array element by element into a single reused value and pass it to a callback,
+    # instead of storing all elements into the slice:
+    # - <func_name>(data []byte, fn func(*Element) error) error
+    # - <func_name>Reader(r io.Reader, fn func(*Element) error) error, which reads only one element at a time into memory
+    # If fn returns an error, parsing stops and the error is returned.
+    def generate_each(self, func_name: str = 'UnmarshalEach'):
+        assert self.typename
+        for _ in Package.current.variants():
+            for name in (func_name, func_name + 'Reader'):
+                if f'{self.typename}.{name}' in Package.current.unmarshalers:
+                    raise Exception(f'{self.typename}.{name} already defined')
+                Package.current.unmarshalers.add(f'{self.typename}.{name}')
+            self.generate_type()
+            self.generate_parser()
+            Import('io')
+            for name, args, each in (
+                    (func_name, 'data []byte', 'pEachElement(&data, new(int), '),
+                    (func_name + 'Reader', 'r io.Reader', 'pEachElementReader(r, ')):
+                wl(f'func (v *{self.typename}) {name}({args}, fn func(*')
+                self.element_parser.print_type()
+                w(') error) (err error) ')
+                with Braces():
+                    recover_later()
+                    wl('var element ')
+                    self.element_parser.print_type()
+                    wl(each + 'func(b *[]byte, N *int) ')
+                    with Braces():
+                        self.element_parser.zero('&element')
+                        self.element_parser.trim('&element')
+                        with If('err := fn(&element); err != nil'):
+                            wl('panic(passthroughError{err})')
+                    w(')')
+                    wl('return nil')
+
+
+# Used for parsing arrays of variable length, but at most max_len elements, into a Go struct storing elements inline,
+# so that parsing doesn't allocate and elements stay inside the parent value:
+# struct {
+#     Len int
+#     Items [max_len]T
+#     Overflow bool  // Only if overflow == 'flag'
+# }
+# Only the first Len items are valid. Arrays longer than max_len are an error if overflow == 'fail',
+# if overflow == 'flag', the remaining elements are validated and skipped, and Overflow is set to true.
+class BoundedSlice(Parser):
+    def __init__(self, max_len: int, element_parser: Parser, overflow: str = 'fail', **kwargs):
+        assert max_len > 0
+        assert overflow == 'fail' or overflow == 'flag'
+        super().__init__(**kwargs)
+        self.max_len = max_len
+        self.element_parser = element_parser
+        self.overflow = overflow
+
+    def type_id(self):
+        return BoundedSlice, self.max_len, self.element_parser.type_id(), self.element_parser.typename, self.overflow
+
+    def parser_id(self):
+        return self.element_parser.parser_id()
+
+    def zero(self, pvar: str):
+        wl(f'{pvar.lstrip("&")}.Len = 0')
+        if self.overflow == 'flag':
+            wl(f'{pvar.lstrip("&")}.Overflow = false')
+
+    def long_typename(self):
+        w('struct ')
+        with Braces():
+            wl('Len int')
+            wl(f'Items [{self.max_len}]')
+            self.element_parser.print_type()
+            if self.overflow == 'flag':
+                wl('Overflow bool')
+
+    # Items are parsed in place and only the first Len are valid, the others may be left from previous values.
+    # Leaves of items at index Len and above are masked with zero values, see masked() in the Python bindings.
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        prefix = name + '.' if name else ''
+        leaves = [(prefix + 'Len', f'{var}.Len', 'int64')]
+        for i in range(self.max_len):
+            leaves += [(leaf_name, f'masked({var}.Len > {i}, {leaf_var})', dtype)
+                       for leaf_name, leaf_var, dtype in self.element_parser.leaves(f'{prefix}Items[{i}]', f'{var}.Items[{i}]')]
+        if self.overflow == 'flag':
+            leaves.append((prefix + 'Overflow', f'{var}.Overflow', 'bool'))
+        return leaves
+
+    # Elements are parsed in place, so they are reused like the value itself.
+    # If overflow == 'flag', samples may be longer than max_len, so that tests and fuzz targets cover skipped elements.
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        max_len = self.max_len + 2 if self.overflow == 'flag' else self.max_len
+        return sample_sequence([self.element_parser.sample(rng, reused) for _ in range(rng.randint(0, max_len))])
+
+    def references_input(self) -> bool:
+        return self.element_parser.references_input()
+
+    def generate_type(self):
+        self.element_parser.generate_type()
+        super().generate_type()
+
+    def generate_parser(self):
+        self.element_parser.generate_parser()
+        new, t = Package.RegisterType(self)
+        assert not new
+        new, f = Package.RegisterParser(self)
+        if new:
+            with Func(parser_signature(f, t)):
+                wl("pTrimByte(b, N, '[')")
+                wl(f'{common("trimLeftSpace")}(b, N)')
+                with If('*N >= len(*b)'):
+                    wl('panic(ParseError{*b, *N, errEofArray})')
+                with If("(*b)[*N] == ']'"):
+                    wl('*N++')
+                    wl('return')
+                with For():
+                    with If('v.Len == len(v.Items)'):
+                        if self.overflow == 'fail':
+                            wl('panic(ParseError{*b, *N, errArrayTooLong})')
+                        else:
+                            wl('v.Overflow = true')
+                            wl(f'{common("pTrimValue")}(b, N)')
+                    with Else():
+                        self.element_parser.zero('&v.Items[v.Len]')
+                        self.element_parser.trim('&v.Items[v.Len]')
+                        wl('v.Len++')
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+                    with If('*N >= len(*b)'):
+                        wl('panic(ParseError{*b, *N, errEofArray})')
+                    with If("(*b)[*N] == ']'"):
+                        wl('*N++')
+                        wl('return')
+                    wl("pTrimByte(b, N, ',')")
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+
+    def generate_validator(self):
+        self.element_parser.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
+                wl("pTrimByte(b, N, '[')")
+                wl('trimLeftSpace(b, N)')
+                with If('*N >= len(*b)'):
+                    wl('panic(ParseError{*b, *N, errEofArray})')
+                with If("(*b)[*N] == ']'"):
+                    wl('*N++')
+                    wl('return')
+                with For('n := 0; ; n++'):
+                    # Every element from index max_len on is skipped, like when parsing
+                    with If(f'n >= {self.max_len}'):
+                        if self.overflow == 'fail':
+                            wl('panic(ParseError{*b, *N, errArrayTooLong})')
+                        else:
+                            wl('pTrimValue(b, N)')
+                    with Else():
+                        self.element_parser.validate()
+                    wl('trimLeftSpace(b, N)')
+                    with If('*N >= len(*b)'):
+                        wl('panic(ParseError{*b, *N, errEofArray})')
                     with If("(*b)[*N] == ']'"):
                         wl('*N++')
                         wl('return')
                     wl("pTrimByte(b, N, ',')")
                     wl('trimLeftSpace(b, N)')
-                    self.element_parser.trim('&element')
-                    wl(f'*v = append(*v, element)')
 
 
 # Used for parsing JSON objects with known keys and known value types into a Go struct
@@ -421,84 +1392,217 @@ class Struct(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
-                wls('''
-                var nonEmpty bool
-                pTrimByte(b, N, '{')
-                trimLeftSpace(b, N)
-                ''')
-                with For():
-                    wls(r'''
-                    c := pNextByte(b, N)
-                    if c == '}' {
-                        break
-                    }
-                    if nonEmpty && c == ',' {
-                        trimLeftSpace(b, N)
-                        c = pNextByte(b, N)
-                    }
-                    *N--
-                    key := pTrimKeyColon(b, N)
-                    nonEmpty = true
-                    ''')
-                    if all(len(k.encode('utf-8')) == 1 for k in self.names.values()) and len(
-                            set(k.encode('utf-8')[0] for k in self.names.values())) == len(self.names):
-                        self.key_switch_len1('v')
-                    else:
-                        self.key_switch('v')
+            with Func(parser_signature(f, t)):
+                self.object_loop('v')
 
-    def skip_or_fail(self):
-        if self.other_keys == 'skip':
-            wl('pTrimValue(b, N)')
+    def generate_validator(self):
+        for t in self.fields.values():
+            t.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
+                self.object_loop(None)
+
+    def trim_resumable(self, pvar: str):
+        trim_frame(self, pvar)
+
+    # Fields are numbered from 1 in frames of the resumable parser, 0 stands for the value of an unknown key
+    def generate_resumable_parser(self):
+        for p in self.fields.values():
+            p.generate_resumable_parser()
+        new, t = Package.RegisterType(self)
+        assert not new
+        new, f = Package.RegisterParser(self)
+        assert not new
+        if f in Package.current.resumables:
+            return
+        Package.current.resumables.add(f)
+        with Func(f'rTrim{f}(d *Decoder, k int, v *type{t}) bool'):
+            wl('d.enter(k)')
+            with For():
+                with Switch('d.frames[k].state'):
+                    with Case('frameValue'):
+                        if self.fields:
+                            with Switch('d.frames[k].field'):
+                                for i, (k, p) in enumerate(self.fields.items(), 1):
+                                    with Case(str(i)):
+                                        p.trim_resumable(field_pointer('v', k))
+                                with Default():
+                                    self.skip_resumable()
+                            wl('d.frames[k].state = frameAfter')
+                        else:
+                            self.skip_resumable()
+                    with Case('frameColon'):
+                        with If('!d.colon(k)'):
+                            wl('return false')
+                    with Default():
+                        wls('''
+                        key, done, ok := d.key(k)
+                        if !ok || done {
+                            return done
+                        }
+                        ''')
+                        with Switch('string(key)'):
+                            for i, k in enumerate(self.fields, 1):
+                                with Case(f'"{self.names[k]}"'):
+                                    wl(f'd.frames[k].field = {i}')
+                            with Default():
+                                if self.other_keys == 'skip':
+                                    wl('d.frames[k].field = 0')
+                                else:
+                                    wl(r'panic(ParseError{key, 0, errUnexpectedKey + string(key) + "\""})')
+
+    def references_input(self) -> bool:
+        return any(p.references_input() for p in self.fields.values())
+
+    # Generates code that skips the value of an unknown key inside the resumable parser
+    def skip_resumable(self):
+        wls('''
+        if !d.skip() {
+            return false
+        }
+        d.frames[k].state = frameSkipped
+        continue
+        ''')
+
+    # Generates the loop over keys of the object, fields are parsed into pvar, or only validated if pvar is None
+    def object_loop(self, pvar: str | None):
+        wls('''
+        var nonEmpty bool
+        pTrimByte(b, N, '{')
+        {trimLeftSpace}(b, N)
+        ''', trimLeftSpace=common('trimLeftSpace'))
+        with For():
+            wls(r'''
+            c := pNextByte(b, N)
+            if c == '}' {
+                break
+            }
+            if nonEmpty && c == ',' {
+                {trimLeftSpace}(b, N)
+                c = pNextByte(b, N)
+            }
+            *N--
+            key := {pTrimKeyColon}(b, N)
+            nonEmpty = true
+            ''', trimLeftSpace=common('trimLeftSpace'), pTrimKeyColon=common('pTrimKeyColon'))
+            if all(len(k.encode('utf-8')) == 1 for k in self.names.values()) and len(
+                    set(k.encode('utf-8')[0] for k in self.names.values())) == len(self.names):
+                self.key_switch_len1(pvar)
+            else:
+                self.key_switch(pvar)
+
+    # Name of this struct used by instrumentation counters
+    def instrument_name(self):
+        return self.typename or parser_name(Package.RegisterParser(self)[1])
+
+    # Generates code that parses field k into the struct at pvar, or only validates it if pvar is None.
+    # Validators are not instrumented.
+    def trim_field(self, pvar: str | None, k: str, t: Parser):
+        if pvar is None:
+            t.validate()
+        else:
+            with Instrumented(f'{self.instrument_name()}.{k}'):
+                t.trim(field_pointer(pvar, k))
+
+    def skip_or_fail(self, pvar: str | None):
+        if self.other_keys == 'skip' and pvar is None:
+            wl(f'{common("pTrimValue")}(b, N)')
+        elif self.other_keys == 'skip':
+            with Instrumented(f'{self.instrument_name()} unknown keys'):
+                wl(f'{common("pTrimValue")}(b, N)')
         else:
             wl(r'panic(ParseError{*b, *N, errUnexpectedKey + key + "\""})')
 
+    # Same as skip_or_fail, but also continues with the next key, used before the key switch
+    def skip_or_fail_early(self, pvar: str | None):
+        self.skip_or_fail(pvar)
+        if self.other_keys == 'skip':
+            wl('continue')
+
     # Detects the field corresponding to an object key by using a string switch.
-    def key_switch(self, pvar: str):
+    def key_switch(self, pvar: str | None):
         with Switch('key'):
             for k, t in self.fields.items():
                 with Case(f'"{self.names[k]}"'):
-                    t.trim(field_pointer(pvar, k))
-                    wl('trimLeftSpace(b, N)')
+                    self.trim_field(pvar, k, t)
+                    wl(f'{common("trimLeftSpace")}(b, N)')
             with Default():
-                self.skip_or_fail()
+                self.skip_or_fail(pvar)
 
     # Detects the field corresponding to an object key by a switch on first characters,
     # if all fields have different first characters. Appears slower than string switch.
-    def key_switch_by_first_byte(self, pvar: str):
+    def key_switch_by_first_byte(self, pvar: str | None):
         assert all(len(k.encode('utf-8')) >= 1 for k in self.names.values())
         assert len(set(k.encode('utf-8')[0] for k in self.names.values())) == len(self.names)
         with If('len(key) == 0'):
-            self.skip_or_fail()
+            self.skip_or_fail_early(pvar)
         with Switch('key[0]'):
             for k, t in self.fields.items():
                 with Case(str(self.names[k].encode('utf-8')[0])):
                     with If('key != "' + self.names[k] + '"'):
-                        self.skip_or_fail()
-                    t.trim(field_pointer(pvar, k))
-                    wl('trimLeftSpace(b, N)')
+                        self.skip_or_fail_early(pvar)
+                    self.trim_field(pvar, k, t)
+                    wl(f'{common("trimLeftSpace")}(b, N)')
             with Default():
-                self.skip_or_fail()
+                self.skip_or_fail(pvar)
 
     # Detects the field corresponding to an object key by a switch on first characters,
     # if all fields have length 1. Faster than full string switch.
-    def key_switch_len1(self, pvar: str):
+    def key_switch_len1(self, pvar: str | None):
         assert all(len(k.encode('utf-8')) == 1 for k in self.names.values())
         assert len(set(k.encode('utf-8')[0] for k in self.names.values())) == len(self.names)
         with If('len(key) != 1'):
-            self.skip_or_fail()
+            self.skip_or_fail_early(pvar)
         with Switch('key[0]'):
             for k, t in self.fields.items():
                 with Case(str(self.names[k].encode('utf-8')[0])):
-                    t.trim(field_pointer(pvar, k))
-                    wl('trimLeftSpace(b, N)')
+                    self.trim_field(pvar, k, t)
+                    wl(f'{common("trimLeftSpace")}(b, N)')
             with Default():
-                self.skip_or_fail()
+                self.skip_or_fail(pvar)
 
     def zero(self, pvar: str):
         for k, t in self.fields.items():
             t.zero(field_pointer(pvar, k))
 
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        return [leaf for k, t in self.fields.items() for leaf in t.leaves(f'{name}.{k}' if name else k, f'{var}.{k}')]
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        fields = [(self.names[k], t.sample(rng, reused)) for k, t in self.fields.items()]
+        rng.shuffle(fields)
+        allocs = [a for _, (_, a) in fields]
+        data = ','.join(json.dumps(name, ensure_ascii=False) + ':' + data for name, (data, _) in fields)
+        return '{' + data + '}', None if None in allocs else sum(allocs)
+
+    def mirrorable(self) -> bool:
+        return True
+
+    # Fields that encoding/json can't parse keep their type and are tagged with `json:"-"`, so they are skipped
+    def mirror_type(self, keys: set[str]):
+        keys.update(self.names.values())
+        w(f'struct {{')
+        if self.fields:
+            with Indent():
+                for k, t in self.fields.items():
+                    name = self.names[k]
+                    # Characters allowed in names of json tags by encoding/json
+                    valid = name and name != '-' and all(c.isalnum() or c in '!#$%&()*+-./:;<=>?@[]^_{|}~ ' for c in name)
+                    wl(f'X{k} ')
+                    if valid and t.mirrorable():
+                        t.mirror_type(keys)
+                        w(f' `json:"{name}"`')
+                    elif valid and isinstance(t, QuotedFloat64):
+                        t.print_type()
+                        w(f' `json:"{name},string"`')
+                    else:
+                        t.print_type()
+                        w(' `json:"-"`')
+            wl('}')
+        else:
+            w('}')
+
 
 # Used for parsing JSON objects with known value types
 class Map(Parser):
@@ -532,7 +1636,37 @@ class Map(Parser):
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
+            with Func(parser_signature(f, t)):
+                wls('''
+                var nonEmpty bool
+                pTrimByte(b, N, '{')
+                {trimLeftSpace}(b, N)
+                ''', trimLeftSpace=common('trimLeftSpace'))
+                with For():
+                    wls(r'''
+                    c := pNextByte(b, N)
+                    if c == '}' {
+                        break
+                    }
+                    if nonEmpty && c == ',' {
+                        {trimLeftSpace}(b, N)
+                        c = pNextByte(b, N)
+                    }
+                    *N--
+                    key := {pTrimKeyColon}(b, N)
+                    nonEmpty = true
+                    ''', trimLeftSpace=common('trimLeftSpace'), pTrimKeyColon=common('pTrimKeyColon'))
+                    wl('var value ')
+                    self.value_parser.print_type()
+                    self.value_parser.trim('&value')
+                    wl(f'{common("trimLeftSpace")}(b, N)')
+                    wl('(*v)[key] = value')
+
+    def generate_validator(self):
+        self.value_parser.generate_validator()
+        new, f = Package.RegisterValidator(self)
+        if new:
+            with Func(f'vTrim{f}(b *[]byte, N *int)'):
                 wls('''
                 var nonEmpty bool
                 pTrimByte(b, N, '{')
@@ -549,34 +1683,64 @@ class Map(Parser):
                         c = pNextByte(b, N)
                     }
                     *N--
-                    key := pTrimKeyColon(b, N)
+                    pTrimKeyColon(b, N)
                     nonEmpty = true
                     ''')
-                    wl('var value ')
-                    self.value_parser.print_type()
-                    self.value_parser.trim('&value')
+                    self.value_parser.validate()
                     wl('trimLeftSpace(b, N)')
-                    wl('(*v)[key] = value')
 
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = make(')
         self.print_type()
         w(')')
 
+    # The map is made for every parse, allocations depend on its size
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        keys = set(self.key_parser.sample(rng, False)[0] for _ in range(rng.randint(0, 3)))
+        return '{' + ','.join(k + ':' + self.value_parser.sample(rng, False)[0] for k in sorted(keys)) + '}', None
+
+    def mirrorable(self) -> bool:
+        return self.value_parser.mirrorable()
+
+    def mirror_type(self, keys: set[str]):
+        w('map[')
+        self.key_parser.print_type()
+        w(']')
+        self.value_parser.mirror_type(keys)
+
+    # Keys are never copied
+    def references_input(self) -> bool:
+        return True
+
 
 # Used for parsing floats delimited by quotes
 class QuotedFloat64(Parser):
+    numpy_dtype = 'float64'
+
     def trim(self, pvar: str):
         self.trim_using(pvar, 'pTrimQuotedFloat64')
 
+    def validate(self):
+        self.validate_using('pTrimQuotedFloat64')
+
+    # pTrimQuotedFloat64 is generated along with the parser
+    def generate_validator(self):
+        self.generate_parser()
+
+    # encoding/json parses quoted floats only into struct fields tagged with ",string", see Struct.mirror_type()
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return f'"{random_number(rng, 1e6, 6)}"', 0
+
     def zero(self, pvar: str):
         wl(f'{dereference(pvar)} = 0')
 
     def long_typename(self):
         w('float64')
 
+    # pTrimQuotedFloat64 doesn't skip anything, so indexed parsers share it with regular ones
     def generate_parser(self):
-        new, f = Package.RegisterParser(self)
+        with Package.current.Indexing(False):
+            new, f = Package.RegisterParser(self)
         if new:
             wls('''
             func pTrimQuotedFloat64(b *[]byte, N *int) float64 {
@@ -612,12 +1776,25 @@ class Float64WithSrc(Parser):
             wl('Value float64')
             wl('Src []byte')
 
+    def leaves(self, name: str, var: str) -> list[tuple[str, str, str]]:
+        return [(name, f'{var}.Value', 'float64')]
+
+    def validate(self):
+        self.validate_using('pTrimFloat64')
+
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        return random_number(rng, 1e6, 6), 0
+
+    # Src is never copied
+    def references_input(self) -> bool:
+        return True
+
     def generate_parser(self):
         new, t = Package.RegisterType(self)
         assert not new
         new, f = Package.RegisterParser(self)
         if new:
-            with Func(f'pTrim{f}(b *[]byte, N *int, v *type{t})'):
+            with Func(parser_signature(f, t)):
                 wls('''
                 n := *N
                 v.Value = pTrimFloat64(b, N)
@@ -626,18 +1803,87 @@ class Float64WithSrc(Parser):
                 ''')
 
 
+# Used for capturing any JSON value as is into a []byte, e.g. to forward a part of a document without re-encoding it.
+# The value is validated but not parsed, and the bytes are kept exactly as they are, without surrounding whitespace.
+# Argument copy: whether the result should be a copy or just a reference to a part of the buffer we are parsing from
+class Raw(Parser):
+    def __init__(self, copy: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.copy = copy
+
+    def type_id(self):
+        return Raw
+
+    def parser_id(self):
+        return self.copy
+
+    def zero(self, pvar: str):
+        wl(f'{dereference(pvar)} = {index(pvar, ":0")}')
+
+    def long_typename(self):
+        w('[]byte')
+
+    # Copies are appended to the previous value, so they allocate only if the value is not reused
+    def sample(self, rng: random.Random, reused: bool) -> tuple[str, int | None]:
+        data = rng.choice([Int64(), String(), Slice(Float64()), Struct({'a': Bool(), 'b': String()})]).sample(rng, True)[0]
+        return data, 1 if self.copy and not reused else 0
+
+    def mirrorable(self) -> bool:
+        return True
+
+    def mirror_type(self, keys: set[str]):
+        Import('encoding/json')
+        w('json.RawMessage')
+
+    def references_input(self) -> bool:
+        return not self.copy
+
+    def validate(self):
+        self.validate_using('pTrimRaw')
+
+    def generate_parser(self):
+        new, t = Package.RegisterType(self)
+        assert not new
+        new, f = Package.RegisterParser(self)
+        if new:
+            with Func(parser_signature(f, t)):
+                if self.copy:
+                    wl('*v = append((*v)[:0], pTrimRaw(b, N)...)')
+                else:
+                    wl('*v = pTrimRaw(b, N)')
+
+
 # This context manager takes care of managing the set of defined types, parsers and unmarshalers.
 # Also, it also takes care of writing all the generated code into Go files inside the provided directory path.
 class Package:
     current: 'Package' = None
 
     # Argument output_dir is the directory where we want to save the generated code
-    def __init__(self, output_dir: str):
+    # Argument python_bindings turns on generating a shared library with Python bindings, see PythonBindings
+    # Argument tests turns on generating gopyjson_test.go with tests, benchmarks and fuzz targets, see Parser.generate_tests()
+    # Argument instrument turns on generating gopyjson_instrument.go, an instrumented copy of the generated code
+    # used instead of gopyjson.go when building with "-tags gopyjson_instrument", see go/instrument.go
+    # Argument pgo_profile is a CPU profile copied to <output_dir>/gopyjson/default.pgo, which Go uses for
+    # profile-guided optimization when the gopyjson package is the main package of a build, e.g. in "go test".
+    # Functions in the profile are matched by name, so it must be collected from the same generated package.
+    def __init__(self, output_dir: str, python_bindings: bool = False, tests: bool = False, instrument: bool = False,
+                 pgo_profile: str = ''):
         self.output_dir = output_dir
+        self.pgo_profile = pgo_profile
+        self.python_bindings = python_bindings
+        self.tests = tests
+        self.instrument = instrument
+        self.instrumenting = False  # Whether instrumented code is being generated
+        self.indexing = False  # Whether indexed parsers are being generated, see Indexing()
+        self.instrumented = ({}, {}, set(), set(), {}, set())  # Registries of the instrumented code, swapped in by variants()
+        self.counters: dict[str, int] = {}  # Instrumentation counters, saved as a mapping name -> index
         self.types: dict[any, int] = {}  # Defined types, saved as a mapping type_id -> unique integer
         self.parsers: dict[any, int] = {}  # Defined parsers, saved as a mapping (type_id, parser_id) -> unique integer
         self.typenames: set[str] = set()  # Defined typenames
-        self.unmarshalers: set[str] = set()  # Defined unmarshalers
+        self.unmarshalers: set[str] = set()  # Defined unmarshalers and validate functions
+        self.validators: dict[any, int] = {}  # Defined validators, saved as a mapping (type_id, parser_id) -> unique integer
+        self.resumables: set[int] = set()  # Parsers with a defined resumable parser, see Parser.generate_resumable()
+        self.bindings: list[tuple[str, str, list]] = []  # Unmarshalers exported to Python as (typename, func_name, leaves)
 
     def __enter__(self):
         assert Package.current is None  # Nested context manager not allowed
@@ -652,11 +1898,63 @@ class Package:
         shutil.copyfile('go/common.go', output_dir.joinpath('common.go'))
         self.file = File(output_dir.joinpath('gopyjson.go'), 'gopyjson')
         self.file.__enter__()
+        if self.pgo_profile:
+            shutil.copyfile(self.pgo_profile, output_dir.joinpath('default.pgo'))
+        if self.instrument:
+            shutil.copyfile('go/instrument.go', output_dir.joinpath('instrument.go'))
+            self.file.header = '//go:build !gopyjson_instrument\n\n'
+            self.instrument_file = File(output_dir.joinpath('gopyjson_instrument.go'), 'gopyjson')
+            self.instrument_file.header = '//go:build gopyjson_instrument\n\n'
+        if self.tests:
+            # Helpers used by generated fuzz targets
+            shutil.copyfile('go/fuzz_test.go', output_dir.joinpath('fuzz_test.go'))
+            self.test_file = File(output_dir.joinpath('gopyjson_test.go'), 'gopyjson')
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.file.__exit__(exc_type, exc_val, exc_tb)
+        if self.instrument:
+            self.instrument_file.__enter__()
+            wl()
+            wl(f'var instrumentCounters [{len(self.counters)}]instrumentCounter')
+            wl()
+            with Func('init()'):
+                wl('instrumentRegister([]string{')
+                with Indent():
+                    for name in self.counters:
+                        wl(f'{json.dumps(name)},')
+                wl('}, instrumentCounters[:])')
+            self.instrument_file.__exit__(exc_type, exc_val, exc_tb)
+        if self.tests:
+            self.test_file.__enter__()
+            self.test_file.__exit__(exc_type, exc_val, exc_tb)
+        if self.python_bindings and exc_type is None:
+            PythonBindings(self.file.filepath.parent, self.bindings).generate()
         Package.current = None
 
+    # Generation of every unmarshaler is run in a loop over this generator, once for every variant of the generated code.
+    # If instrumentation is turned on, the second run generates instrumented code into its own file,
+    # with its own registries of types, parsers, unmarshalers, validators and resumable parsers.
+    def variants(self):
+        yield
+        if self.instrument:
+            regular = self.types, self.parsers, self.typenames, self.unmarshalers, self.validators, self.resumables
+            self.types, self.parsers, self.typenames, self.unmarshalers, self.validators, self.resumables = \
+                self.instrumented
+            self.instrumenting = True
+            with Into(self.instrument_file):
+                yield
+            self.instrumenting = False
+            self.instrumented = self.types, self.parsers, self.typenames, self.unmarshalers, self.validators, self.resumables
+            self.types, self.parsers, self.typenames, self.unmarshalers, self.validators, self.resumables = regular
+
+    # Parsers generated inside the "with" block are indexed parsers if indexing is True, see Parser.generate_indexed().
+    # Indexed parsers are registered separately from regular ones.
+    @contextmanager
+    def Indexing(self, indexing: bool = True):
+        previous, self.indexing = self.indexing, indexing
+        yield
+        self.indexing = previous
+
     # Registers the given type if an equal type was not registered already.
     # Returns whether the type was registered.
     @staticmethod
@@ -671,8 +1969,190 @@ class Package:
     # Returns whether if was registered and its unique index in the list of registered types
     @staticmethod
     def RegisterParser(parser: Parser) -> tuple[bool, int]:
-        pid = (parser.type_id(), parser.parser_id())
+        pid = (parser.type_id(), parser.parser_id(), Package.current.indexing)
         if pid in Package.current.parsers:
             return False, Package.current.parsers[pid]
         Package.current.parsers[pid] = len(Package.current.parsers)
         return True, len(Package.current.parsers) - 1
+
+    # Registers the validator for a given type if an equivalent validator was not registered already.
+    # Returns whether it was registered and its unique index in the list of registered validators
+    @staticmethod
+    def RegisterValidator(parser: Parser) -> tuple[bool, int]:
+        pid = (parser.type_id(), parser.parser_id())
+        if pid in Package.current.validators:
+            return False, Package.current.validators[pid]
+        Package.current.validators[pid] = len(Package.current.validators)
+        return True, len(Package.current.validators) - 1
+
+
+# Generates Python bindings for the generated parsers inside <output_dir>/gopyjson/python:
+# - gopyjson.go and common.go, copies of the generated parsers in package main
+# - exports.go, which exports a C function for every unmarshaler that has scalar values
+# - bindings.py, a ctypes wrapper which parses NDJSON into NumPy arrays, one array for every scalar value
+# The shared library is built with "go build -buildmode=c-shared -o libgopyjson.so" inside that directory.
+class PythonBindings:
+    def __init__(self, package_dir: Path, bindings: list[tuple[str, str, list[tuple[str, str, str]]]]):
+        self.package_dir = package_dir
+        self.bindings = [(typename, func_name, leaves) for typename, func_name, leaves in bindings if leaves]
+
+    def generate(self):
+        output_dir = self.package_dir.joinpath('python')
+        output_dir.mkdir(exist_ok=True)
+        # c-shared libraries must be built from package main, so the generated code is copied into it
+        for filename in ('gopyjson.go', 'common.go'):
+            code = self.package_dir.joinpath(filename).read_text()
+            if code.startswith('//go:build'):  # The bindings are always built from the regular code
+                code = code.split('\n\n', 1)[1]
+            output_dir.joinpath(filename).write_text(code.replace('package gopyjson\n', 'package main\n', 1))
+        with File(output_dir.joinpath('exports.go'), 'main'):
+            self.generate_exports()
+        with open(output_dir.joinpath('bindings.py'), 'w') as f:
+            f.write(self.python_code())
+
+    def generate_exports(self):
+        Import('C')
+        Import('bytes')
+        Import('unsafe')
+        wls('''
+
+        func main() {}
+
+        // masked returns v if valid is true, and the zero value of its type otherwise
+        func masked[T any](valid bool, v T) T {
+            if valid {
+                return v
+            }
+            var zero T
+            return zero
+        }
+
+        // exportError saves err to a C buffer of the given size as a null-terminated string, truncating it if necessary
+        func exportError(err error, buffer unsafe.Pointer, size int64) {
+            if size <= 0 {
+                return
+            }
+            s := unsafe.Slice((*byte)(buffer), size)
+            s[copy(s[:size-1], err.Error())] = 0
+        }
+
+        // nextLine returns the next line of data starting at position offset, and the position where the following line starts
+        func nextLine(data []byte, offset int64) ([]byte, int64) {
+            line := data[offset:]
+            if i := bytes.IndexByte(line, '\\n'); i >= 0 {
+                return line[:i], offset + int64(i) + 1
+            }
+            return line, int64(len(data))
+        }
+        ''')
+        for typename, func_name, leaves in self.bindings:
+            wl()
+            wl(f'// gopyjson_{typename}_{func_name} parses NDJSON data of the given size starting at position *offset,')
+            wl(f'// saving scalar values of at most rows objects into arrays given by columns.')
+            wl(f'// Returns the number of parsed objects and updates *offset, or -1 on error, in which case the error message is saved to errorBuffer.')
+            wl(f'//export gopyjson_{typename}_{func_name}')
+            with Func(f'gopyjson_{typename}_{func_name}(data unsafe.Pointer, size int64, offset *int64, '
+                      f'columns *unsafe.Pointer, rows int64, errorBuffer unsafe.Pointer, errorSize int64) int64'):
+                wl(f'var v {typename}')
+                wl('b := unsafe.Slice((*byte)(data), size)')
+                wl(f'c := unsafe.Slice(columns, {len(leaves)})')
+                for i, (_, _, dtype) in enumerate(leaves):
+                    wl(f'c{i} := unsafe.Slice((*{dtype})(c[{i}]), rows)')
+                wl('var row int64')
+                with For('row < rows && *offset < size'):
+                    wl('line, next := nextLine(b, *offset)')
+                    with If('len(bytes.TrimSpace(line)) == 0'):
+                        wl('*offset = next')
+                        wl('continue')
+                    with If(f'err := v.{func_name}(line); err != nil'):
+                        wl('exportError(err, errorBuffer, errorSize)')
+                        wl('return -1')
+                    for i, (_, var, dtype) in enumerate(leaves):
+                        wl(f'c{i}[row] = {dtype}({var})')
+                    wl('row++')
+                    wl('*offset = next')
+                wl('return row')
+
+    def python_code(self) -> str:
+        code = '''# Code generated by gopyjson. DO NOT EDIT.
+# Python bindings for the generated parsers, which parse NDJSON into NumPy arrays.
+# Build the shared library first by running "go build -buildmode=c-shared -o libgopyjson.so" in this directory.
+
+import ctypes
+import mmap
+from pathlib import Path
+
+import numpy as np
+
+_library = ctypes.CDLL(str(Path(__file__).with_name('libgopyjson.so')))
+
+
+class ParseError(Exception):
+    pass
+
+
+# Parses NDJSON objects of one type into NumPy arrays, one for every scalar value.
+# Subclasses are generated for every Go type and set the names and dtypes of columns and the exported Go function.
+# Columns Items[i] of a BoundedSlice hold 0 (or False) in rows where i >= Len, only the first Len items are valid.
+class Parser:
+    columns: list[tuple[str, str]] = []  # Column names and NumPy dtypes
+    function = None  # The exported Go function
+
+    # Parses NDJSON from data (bytes, bytearray, mmap, NumPy array...) starting at position offset into given arrays.
+    # Arrays must contain a contiguous NumPy array for every column, all of the same length, which limits the number of parsed rows.
+    # Returns the number of parsed rows and the position where parsing should continue.
+    @classmethod
+    def parse_into(cls, data, arrays: dict[str, np.ndarray], offset: int = 0) -> tuple[int, int]:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        rows = min(len(arrays[name]) for name, _ in cls.columns)
+        for name, dtype in cls.columns:
+            if arrays[name].dtype != np.dtype(dtype) or not arrays[name].flags.c_contiguous:
+                raise ValueError(f'column {name} must be a contiguous array of type {dtype}')
+        pointers = (ctypes.c_void_p * len(cls.columns))(*(arrays[name].ctypes.data for name, _ in cls.columns))
+        position = ctypes.c_int64(offset)
+        error = ctypes.create_string_buffer(1024)
+        n = cls.function(buffer.ctypes.data, len(buffer), ctypes.byref(position), pointers, rows, error, len(error))
+        if n < 0:
+            # Messages may contain input bytes and be truncated, so they aren't necessarily valid UTF-8
+            message = error.value.decode(errors='replace').splitlines()
+            raise ParseError(f'{message[0] if message else "parse error"} (at line starting at byte {position.value})')
+        return n, position.value
+
+    # Parses NDJSON from data in batches, yields a dictionary of NumPy arrays for every batch of at most batch_size rows.
+    @classmethod
+    def batches(cls, data, batch_size: int = 1 << 16):
+        offset = 0
+        while offset < len(data):
+            arrays = {name: np.empty(batch_size, dtype) for name, dtype in cls.columns}
+            n, offset = cls.parse_into(data, arrays, offset)
+            if n == 0:
+                break
+            yield {name: array[:n] for name, array in arrays.items()}
+
+    # Parses an NDJSON file, returns a dictionary of NumPy arrays
+    @classmethod
+    def read_file(cls, path: str | Path, batch_size: int = 1 << 16) -> dict[str, np.ndarray]:
+        batches = []
+        with open(path, 'rb') as f:
+            if Path(path).stat().st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    batches = list(cls.batches(data, batch_size))
+        return {name: np.concatenate([batch[name] for batch in batches] or [np.empty(0, dtype)]) for name, dtype in cls.columns}
+
+
+def _export(name: str):
+    function = getattr(_library, name)
+    function.argtypes = [ctypes.c_void_p, ctypes.c_int64, ctypes.POINTER(ctypes.c_int64), ctypes.POINTER(ctypes.c_void_p),
+                         ctypes.c_int64, ctypes.c_char_p, ctypes.c_int64]
+    function.restype = ctypes.c_int64
+    return function
+'''
+        for typename, func_name, leaves in self.bindings:
+            name = typename if func_name == 'Unmarshal' else typename + func_name
+            code += f'''
+
+class {name}(Parser):
+    columns = {[(leaf_name or 'value', dtype) for leaf_name, _, dtype in leaves]!r}
+    function = staticmethod(_export('gopyjson_{typename}_{func_name}'))
+'''
+        return code